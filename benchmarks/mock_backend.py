@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Mock Backend - Configurable stdio MCP server for benchmarks
+
+Exposes --tools tools named tool_0, tool_1, ... whose input schemas have
+--schema-props properties each. Every tools/call answers with a text of
+--response-bytes bytes after --latency milliseconds (+/- --jitter), and fails
+with an error result at --failure-rate. Requests are handled on separate
+threads so concurrent calls overlap like they would on a real server.
+
+Usage: mock_backend.py [--tools N] [--schema-props N] [--response-bytes N]
+                       [--latency MS] [--jitter MS] [--failure-rate P]
+                       [--startup-delay MS]
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+write_lock = threading.Lock()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Configurable mock MCP server")
+    parser.add_argument("--name", default="bench", help="Server name reported by initialize")
+    parser.add_argument("--tools", type=int, default=10, help="Number of tools")
+    parser.add_argument("--schema-props", type=int, default=5, help="Properties per tool input schema")
+    parser.add_argument("--response-bytes", type=int, default=256, help="Size of each tool result text")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds per tool call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- milliseconds added to latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of tool calls that fail")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="Milliseconds to wait before serving")
+    return parser.parse_args()
+
+
+def build_tools(args):
+    """Build the tool list with synthetic input schemas."""
+    properties = {
+        f"field_{index}": {"type": "string", "description": f"Synthetic field {index}"}
+        for index in range(args.schema_props)
+    }
+    return [
+        {
+            "name": f"tool_{index}",
+            "description": f"Synthetic tool {index}",
+            "inputSchema": {"type": "object", "properties": properties}
+        }
+        for index in range(args.tools)
+    ]
+
+
+def write(message):
+    """Write one JSON-RPC message to stdout."""
+    line = json.dumps(message) + "\n"
+    with write_lock:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+
+def handle(request, args, tools, payload):
+    """Answer one request."""
+    method = request.get("method")
+    if "id" not in request:
+        return
+
+    if method == "initialize":
+        result = {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {"tools": {}},
+            "serverInfo": {"name": args.name, "version": "1.0.0"}
+        }
+    elif method == "tools/list":
+        result = {"tools": tools}
+    elif method == "ping":
+        result = {}
+    elif method == "tools/call":
+        delay = args.latency + random.uniform(-args.jitter, args.jitter)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        failed = random.random() < args.failure_rate
+        result = {"content": [{"type": "text", "text": payload}], "isError": failed}
+    else:
+        write({"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32601, "message": f"Method {method} not found"}})
+        return
+
+    write({"jsonrpc": "2.0", "id": request["id"], "result": result})
+
+
+def main():
+    args = parse_args()
+    tools = build_tools(args)
+    payload = "x" * args.response_bytes
+    if args.startup_delay > 0:
+        time.sleep(args.startup_delay / 1000)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        threading.Thread(target=handle, args=(request, args, tools, payload), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
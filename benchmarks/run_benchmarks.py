@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Benchmarks - Measure generator, discovery and proxy performance offline
+
+Starts configurable mock backends (benchmarks/mock_backend.py), generates a
+filtered server combining them, and drives it with a synthetic tools/call
+workload. The same workload is also sent straight to one mock backend as a
+baseline, so the proxy's own overhead can be read off the difference.
+
+Reports:
+    generate     time to generate the wrapper code
+    discovery    time for MCPClient to start a backend and list its tools
+    startup      time from launching the wrapper to a complete tools/list
+    first call   time from launching the wrapper to the first tool result
+    throughput   tool calls per second with --concurrency calls in flight
+    p50 / p99    tool call latency percentiles
+    rss          resident memory of the wrapper after the workload (Linux)
+
+Usage: python benchmarks/run_benchmarks.py [--servers N] [--tools N] [--requests N] ...
+       python benchmarks/run_benchmarks.py --help
+"""
+
+import argparse
+import json
+import math
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_filter.core.generator import CodeGenerator  # noqa: E402
+from mcp_filter.core.mcp_client import MCPClient  # noqa: E402
+
+MOCK_BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_backend.py")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark mcp-filter against mock MCP backends")
+    parser.add_argument("--servers", type=int, default=2, help="Mock backends combined by the wrapper")
+    parser.add_argument("--tools", type=int, default=20, help="Tools per backend")
+    parser.add_argument("--selected", type=int, default=5, help="Tools selected per backend")
+    parser.add_argument("--schema-props", type=int, default=10, help="Properties per tool input schema")
+    parser.add_argument("--response-bytes", type=int, default=1024, help="Size of each tool result")
+    parser.add_argument("--latency", type=float, default=5.0, help="Backend milliseconds per call")
+    parser.add_argument("--jitter", type=float, default=2.0, help="Random +/- milliseconds per call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--requests", type=int, default=2000, help="Tool calls per workload")
+    parser.add_argument("--concurrency", type=int, default=32, help="Tool calls kept in flight")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON to FILE")
+    return parser.parse_args()
+
+
+def backend_command(args, name: str) -> str:
+    """Command line starting one mock backend with the workload settings."""
+    return (
+        f"{sys.executable} {MOCK_BACKEND} --name {name} --tools {args.tools} "
+        f"--schema-props {args.schema_props} --response-bytes {args.response_bytes} "
+        f"--latency {args.latency} --jitter {args.jitter} --failure-rate {args.failure_rate}"
+    )
+
+
+def percentile(values, percent: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def rss_mb(pid: int):
+    """Resident set size of a process in MiB, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class StdioDriver:
+    """Drive a stdio MCP server, timing every request by id."""
+
+    def __init__(self, argv):
+        self.started_at = time.perf_counter()
+        self.process = subprocess.Popen(
+            argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self.lock = threading.Lock()
+        self.sent = {}
+        self.responses = {}
+        self.latencies = []
+        self.errors = 0
+        self.window = None
+        self.answered = threading.Condition(self.lock)
+        self.next_id = 1
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            message = json.loads(line)
+            if "id" not in message:
+                continue
+            now = time.perf_counter()
+            with self.lock:
+                sent_at = self.sent.pop(message["id"], None)
+                if sent_at is not None:
+                    self.latencies.append(now - sent_at)
+                result = message.get("result")
+                if "error" in message or (isinstance(result, dict) and result.get("isError")):
+                    self.errors += 1
+                self.responses[message["id"]] = message
+                self.answered.notify_all()
+            if self.window is not None:
+                self.window.release()
+
+    def send(self, method: str, params=None, timed: bool = False) -> int:
+        with self.lock:
+            request_id = self.next_id
+            self.next_id += 1
+            if timed:
+                self.sent[request_id] = time.perf_counter()
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+        self.process.stdin.flush()
+        return request_id
+
+    def wait(self, request_id: int, timeout: float = 60) -> dict:
+        with self.lock:
+            if not self.answered.wait_for(lambda: request_id in self.responses, timeout):
+                raise TimeoutError(f"No response to request {request_id}")
+            return self.responses.pop(request_id)
+
+    def call(self, method: str, params=None) -> dict:
+        return self.wait(self.send(method, params))
+
+    def initialize(self):
+        self.call("initialize", {"protocolVersion": "2024-11-05", "capabilities": {}})
+        self.process.stdin.write(b'{"jsonrpc": "2.0", "method": "notifications/initialized"}\n')
+        self.process.stdin.flush()
+
+    def run_workload(self, tool_names, requests: int, concurrency: int) -> dict:
+        """Send tool calls keeping `concurrency` in flight; return throughput and latencies."""
+        self.latencies = []
+        self.errors = 0
+        self.window = threading.Semaphore(concurrency)
+        started = time.perf_counter()
+        for index in range(requests):
+            self.window.acquire()
+            tool = tool_names[index % len(tool_names)]
+            self.send("tools/call", {"name": tool, "arguments": {"field_0": str(index)}}, timed=True)
+        with self.lock:
+            self.answered.wait_for(lambda: len(self.latencies) >= requests, 300)
+        elapsed = time.perf_counter() - started
+        self.window = None
+        self.responses.clear()
+        return {
+            "throughput": requests / elapsed,
+            "p50_ms": percentile(self.latencies, 50) * 1000,
+            "p99_ms": percentile(self.latencies, 99) * 1000,
+            "errors": self.errors,
+        }
+
+    def close(self):
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def bench_generate(server_commands, selected_tools, rounds: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        CodeGenerator.generate_wrapper_code(server_commands, selected_tools, prefix_collisions=True)
+    return (time.perf_counter() - started) / rounds
+
+
+def bench_discovery(command: str, rounds: int = 3):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        tools = MCPClient(command).get_all_tools()
+    return (time.perf_counter() - started) / rounds, tools
+
+
+def bench_direct(args, command: str, tool_names) -> dict:
+    driver = StdioDriver(shlex.split(command))
+    try:
+        driver.initialize()
+        return driver.run_workload(tool_names, args.requests, args.concurrency)
+    finally:
+        driver.close()
+
+
+def bench_wrapper(args, wrapper_path: str, exposed_names) -> dict:
+    driver = StdioDriver([sys.executable, wrapper_path])
+    try:
+        driver.initialize()
+        while True:
+            tools = driver.call("tools/list")["result"]["tools"]
+            if len(tools) >= len(exposed_names):
+                break
+            time.sleep(0.01)
+        startup = time.perf_counter() - driver.started_at
+
+        driver.call("tools/call", {"name": exposed_names[0], "arguments": {}})
+        first_call = time.perf_counter() - driver.started_at
+
+        results = driver.run_workload(exposed_names, args.requests, args.concurrency)
+        results.update(startup_s=startup, first_call_s=first_call, rss_mb=rss_mb(driver.process.pid))
+        return results
+    finally:
+        driver.close()
+
+
+def main():
+    args = parse_args()
+    server_commands = {f"bench{index}": backend_command(args, f"bench{index}") for index in range(args.servers)}
+
+    discovery_s, tools = bench_discovery(server_commands["bench0"])
+    selected = [
+        dict(tool, server=server_name)
+        for server_name in server_commands
+        for tool in tools[:args.selected]
+    ]
+    generate_s = bench_generate(server_commands, selected)
+
+    direct = bench_direct(args, server_commands["bench0"], [tool["name"] for tool in tools[:args.selected]])
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        wrapper_path = os.path.join(tmpdir, "bench_wrapper.py")
+        CodeGenerator.save_wrapper(
+            CodeGenerator.generate_wrapper_code(server_commands, selected, prefix_collisions=True),
+            wrapper_path
+        )
+        exposed_names = list(CodeGenerator.build_tool_routes(selected, prefix_collisions=True))
+        proxied = bench_wrapper(args, wrapper_path, exposed_names)
+
+    results = {
+        "settings": vars(args),
+        "generate_ms": generate_s * 1000,
+        "discovery_ms": discovery_s * 1000,
+        "direct": direct,
+        "proxy": proxied,
+    }
+
+    print(f"generate    {results['generate_ms']:9.2f} ms  ({len(selected)} tools)")
+    print(f"discovery   {results['discovery_ms']:9.2f} ms  ({args.tools} tools)")
+    print(f"startup     {proxied['startup_s'] * 1000:9.2f} ms")
+    print(f"first call  {proxied['first_call_s'] * 1000:9.2f} ms")
+    print(f"{'':12}{'direct':>12}{'proxy':>12}")
+    for key, label in (("throughput", "calls/s"), ("p50_ms", "p50 ms"), ("p99_ms", "p99 ms"), ("errors", "errors")):
+        print(f"{label:12}{direct[key]:12.1f}{proxied[key]:12.1f}")
+    if proxied["rss_mb"] is not None:
+        print(f"rss         {proxied['rss_mb']:9.1f} MiB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
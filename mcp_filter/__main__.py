@@ -8,6 +8,9 @@ import sys
 import argparse
 
 from mcp_filter.core.config import ConfigManager
+from mcp_filter.core.manifest import generate_from_manifest
+from mcp_filter.core.pool import BackendPool
+from mcp_filter.core.tool_cache import ToolCache
 from mcp_filter.cli.display import display_servers
 from mcp_filter.interactive import InteractiveSession
 
@@ -29,6 +32,11 @@ def main():
         metavar='NAME',
         help="Remove an MCP server configuration"
     )
+    parser.add_argument(
+        "--resolve-npx",
+        metavar='NAME',
+        help="Install an npx server's package once and launch its binary directly from then on"
+    )
     parser.add_argument(
         "--list-servers",
         action="store_true",
@@ -43,6 +51,31 @@ def main():
         "--config-dir",
         help="Custom configuration directory (default: ~/.config/mcp-filter)"
     )
+    parser.add_argument(
+        "--manifest",
+        metavar='FILE',
+        help="Generate every filtered server described in a JSON/YAML manifest, without prompting"
+    )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Ignore cached tool lists and query every selected server"
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Delete all cached tool lists"
+    )
+    parser.add_argument(
+        "--pool",
+        action="store_true",
+        help="Run the shared backend pool daemon that generated servers can attach to"
+    )
+    parser.add_argument(
+        "--pool-socket",
+        metavar='PATH',
+        help="Unix socket for the backend pool (default: ~/.config/mcp-filter/pool.sock)"
+    )
 
     args = parser.parse_args()
 
@@ -65,11 +98,52 @@ def main():
             print(f"Server '{args.remove_server}' not found")
         return
 
+    # Handle npx resolution command
+    if args.resolve_npx:
+        try:
+            spec = config_manager.resolve_npx_server(args.resolve_npx)
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if spec is None:
+            print(f"Server '{args.resolve_npx}' not found")
+            sys.exit(1)
+        print(f"Server '{args.resolve_npx}' now launches {spec['executable']}")
+        return
+
     # Handle list servers command
     if args.list_servers:
         display_servers(servers)
         return
 
+    # Handle clear cache command
+    if args.clear_cache:
+        removed = ToolCache(config_manager.config_dir / "cache").invalidate()
+        print(f"Removed {removed} cached tool list(s)")
+        return
+
+    # Handle backend pool daemon
+    if args.pool:
+        BackendPool(args.pool_socket).run()
+        return
+
+    # Handle batch generation from a manifest
+    if args.manifest:
+        try:
+            failures = generate_from_manifest(
+                args.manifest,
+                servers,
+                args.output_dir,
+                tool_cache=ToolCache(config_manager.config_dir / "cache"),
+                refresh=args.refresh_cache
+            )
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if failures:
+            sys.exit(1)
+        return
+
     # Main flow: interactive session
     if not servers:
         print("\nNo MCP servers configured.")
@@ -79,7 +153,7 @@ def main():
         sys.exit(1)
 
     # Run interactive session
-    session = InteractiveSession(config_manager, args.output_dir)
+    session = InteractiveSession(config_manager, args.output_dir, refresh_cache=args.refresh_cache)
     session.run()
 
 
@@ -79,6 +79,20 @@ def display_server_tools(server_name: str, tools: List[Dict[str, Any]]) -> None:
         print(f"  {idx}. {tool.get('name', 'Unknown')}")
 
 
+def display_discovery_progress(server_name: str, done: int, total: int, tool_count: int) -> None:
+    """
+    Display progress of concurrent server discovery.
+
+    Args:
+        server_name: Server that just finished
+        done: Number of servers finished so far
+        total: Total number of servers being contacted
+        tool_count: Number of tools the server returned
+    """
+    status = f"{tool_count} tools" if tool_count else "no tools"
+    print(f"\n[{done}/{total}] {server_name}: {status}")
+
+
 def display_summary(selected_tools: List[Dict[str, Any]]) -> None:
     """
     Display summary of selected tools grouped by server.
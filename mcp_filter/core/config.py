@@ -9,6 +9,8 @@ import json
 from pathlib import Path
 from typing import Dict, Optional, Any, List
 
+from mcp_filter.core.launch import resolve_npx, server_launch
+
 
 class ConfigManager:
     """Manages MCP server configurations."""
@@ -35,7 +37,8 @@ class ConfigManager:
         First tries to load from user config, then falls back to default servers.
 
         Returns:
-            Dictionary mapping server names to config objects with 'command' and 'env' fields
+            Dictionary mapping server names to config objects with 'command' and 'env'
+            fields, and optionally a structured 'launch' spec (see mcp_filter.core.launch)
         """
         # Try user config first
         if self.config_file.exists():
@@ -83,6 +86,31 @@ class ConfigManager:
         }
         self.save_servers(servers)
 
+    def resolve_npx_server(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Install an npx-launched server's package once and launch its binary from then on.
+
+        The resulting launch spec is saved under the server's 'launch' key, so
+        later discovery and generated servers skip npx package resolution.
+
+        Args:
+            name: Server name
+
+        Returns:
+            The saved launch spec, or None if the server is not configured
+
+        Raises:
+            ValueError: If the server is not started with npx
+            OSError: If the package cannot be installed
+        """
+        servers = self.load_servers()
+        if name not in servers:
+            return None
+        spec = resolve_npx(server_launch(servers[name]), self.config_dir / "npx")
+        servers[name]["launch"] = spec
+        self.save_servers(servers)
+        return spec
+
     def remove_server(self, name: str) -> bool:
         """
         Remove an MCP server configuration.
@@ -0,0 +1,68 @@
+"""
+Discovery - Fetch tool lists from many MCP servers concurrently
+
+This module provides discover_tools, which connects to several servers at once
+(through the on-disk tool cache) and yields each server's tools as soon as that
+server answers, so total wait is the slowest server rather than the sum.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from mcp_filter.core.launch import LaunchTarget
+from mcp_filter.core.mcp_client import MCPClient
+from mcp_filter.core.tool_cache import ToolCache
+
+# Upper bound on servers contacted at once
+MAX_WORKERS = 16
+
+
+def discover_tools(
+    commands: Dict[str, LaunchTarget],
+    tool_cache: Optional[ToolCache] = None,
+    refresh: bool = False,
+    capabilities: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Discover tools from several servers in parallel.
+
+    Args:
+        commands: Dictionary mapping server names to fully resolved commands or launch specs
+        tool_cache: Optional cache consulted before starting each server
+        refresh: Ignore cached entries and query every server
+        capabilities: Optional dictionary filled with the capabilities each
+            server announced, for servers where they are known
+
+    Yields:
+        (server_name, tools) tuples in completion order; tools is empty if the
+        server could not be reached
+    """
+    if not commands:
+        return
+
+    def fetch(server_name: str, command: LaunchTarget) -> List[Dict[str, Any]]:
+        client = MCPClient(command)
+
+        def client_fetch() -> Dict[str, Any]:
+            tools = client.get_all_tools()
+            return {"tools": tools, "capabilities": client.capabilities}
+
+        if tool_cache is None:
+            catalog = client_fetch()
+        else:
+            catalog = tool_cache.get_catalog(server_name, command, client_fetch, refresh=refresh)
+        if capabilities is not None and catalog.get("capabilities") is not None:
+            capabilities[server_name] = catalog["capabilities"]
+        return catalog["tools"]
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(commands))) as executor:
+        futures = {
+            executor.submit(fetch, server_name, command): server_name
+            for server_name, command in commands.items()
+        }
+        for future in as_completed(futures):
+            try:
+                tools = future.result()
+            except Exception:
+                tools = []
+            yield futures[future], tools
@@ -7,28 +7,154 @@ that filter and combine tools from multiple MCP servers.
 
 import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
+from mcp_filter.core.launch import LaunchTarget, launch_spec
+
+# Name of the optional meta-tool that runs several tool calls at once
+BATCH_TOOL_NAME = "batch_call"
 
 class CodeGenerator:
     """Generates filtered MCP server wrapper scripts."""
 
+    @staticmethod
+    def build_tool_routes(
+        selected_tools: List[Dict[str, Any]],
+        tool_aliases: Optional[Dict[str, Dict[str, str]]] = None,
+        prefix_collisions: bool = False
+    ) -> Dict[str, Tuple[str, str]]:
+        """
+        Map each exposed tool name to the server and original name it routes to.
+
+        Args:
+            selected_tools: List of selected tool dictionaries with 'name' and 'server' keys
+            tool_aliases: Optional per-server renames, e.g. {"notion": {"search": "notion_search"}}
+            prefix_collisions: Expose tools whose names clash across servers as
+                '<server>_<name>' instead of failing. A numeric suffix is added if
+                the prefixed name is itself taken.
+
+        Returns:
+            Dictionary mapping exposed tool names to (server, original name) tuples
+
+        Raises:
+            ValueError: If two selected tools would be exposed under the same name
+        """
+        tool_aliases = tool_aliases or {}
+
+        exposed = []
+        seen = set()
+        for tool in selected_tools:
+            server = tool.get('server', 'unknown')
+            # The same tool selected twice is one tool, not a collision
+            if (server, tool['name']) in seen:
+                continue
+            seen.add((server, tool['name']))
+            name = tool_aliases.get(server, {}).get(tool['name'], tool['name'])
+            exposed.append((name, server, tool['name']))
+
+        counts = {}
+        for name, _, _ in exposed:
+            counts[name] = counts.get(name, 0) + 1
+
+        routes = {}
+        collisions = []
+        for name, server, original in exposed:
+            if counts[name] > 1 and prefix_collisions:
+                prefixed = name = f"{server}_{name}"
+                suffix = 2
+                while name in routes or name in counts:
+                    name = f"{prefixed}_{suffix}"
+                    suffix += 1
+            if name in routes:
+                collisions.append(f"{name} ({routes[name][0]}, {server})")
+                continue
+            routes[name] = (server, original)
+
+        if collisions:
+            raise ValueError(
+                f"Tool name collisions: {', '.join(collisions)}. "
+                "Use tool_aliases or prefix_collisions to expose them under distinct names."
+            )
+
+        return routes
+
     @staticmethod
     def generate_wrapper_code(
-        server_commands: Dict[str, str],
-        selected_tools: List[Dict[str, Any]]
+        server_commands: Dict[str, LaunchTarget],
+        selected_tools: List[Dict[str, Any]],
+        startup_timeouts: Optional[Dict[str, float]] = None,
+        tool_aliases: Optional[Dict[str, Dict[str, str]]] = None,
+        prefix_collisions: bool = False,
+        lazy_start: bool = False,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        batch_tool: bool = False,
+        resource_filter: Optional[Dict[str, List[str]]] = None,
+        prompt_filter: Optional[Dict[str, List[str]]] = None,
+        server_capabilities: Optional[Dict[str, Dict[str, Any]]] = None
     ) -> str:
         """
         Generate Python code for a filtered MCP server wrapper.
 
         Args:
-            server_commands: Dictionary mapping server names to their commands
+            server_commands: Dictionary mapping server names to their commands or
+                launch specs (see mcp_filter.core.launch)
             selected_tools: List of selected tool dictionaries with 'name' and 'server' keys
+            startup_timeouts: Optional per-server startup deadlines in seconds, overriding
+                the wrapper's MCP_FILTER_STARTUP_TIMEOUT default
+            tool_aliases: Optional per-server tool renames (see build_tool_routes)
+            prefix_collisions: Prefix clashing tool names with their server name
+            lazy_start: Start each backend on its first tool call instead of at
+                launch, serving tools/list from the embedded schema snapshot, and
+                stop it again after MCP_FILTER_IDLE_TIMEOUT seconds without calls
+            cache_ttls: Optional seconds to cache results per exposed tool name. Tools
+                annotated with readOnlyHint are cached for MCP_FILTER_CACHE_TTL seconds
+                unless listed here; a TTL of 0 disables caching for a tool
+            batch_tool: Also expose a batch_call meta-tool that runs several tool
+                calls concurrently and returns their results in order
+            resource_filter: Optional 'include' and 'exclude' pattern lists selecting
+                the backends' resources and resource templates by URI or name.
+                Patterns may be qualified as '<server>:<pattern>'. All are exposed
+                by default
+            prompt_filter: Optional 'include' and 'exclude' pattern lists selecting
+                the backends' prompts by name
+            server_capabilities: Optional capabilities each server announced during
+                discovery. Resources and prompts are only advertised to clients if
+                some server has them or its capabilities are not listed here
 
         Returns:
             Complete Python wrapper script as a string
+
+        Raises:
+            ValueError: If two selected tools would be exposed under the same name,
+                cache_ttls names a tool that is not exposed, a server command
+                or launch spec is malformed, batch_tool clashes with a tool name,
+                or a resource or prompt filter is malformed
         """
-        tool_names = [tool['name'] for tool in selected_tools]
+        for name, item_filter in (("resource_filter", resource_filter), ("prompt_filter", prompt_filter)):
+            for key, patterns in (item_filter or {}).items():
+                if key not in ("include", "exclude"):
+                    raise ValueError(f"{name} accepts only 'include' and 'exclude', not '{key}'")
+                if not isinstance(patterns, list) or not all(isinstance(pattern, str) for pattern in patterns):
+                    raise ValueError(f"{name}['{key}'] must be a list of patterns")
+
+        for server_name, target in server_commands.items():
+            try:
+                launch_spec(target)
+            except ValueError as e:
+                raise ValueError(f"Server '{server_name}': {e}")
+
+        tool_routes = CodeGenerator.build_tool_routes(
+            selected_tools, tool_aliases, prefix_collisions
+        )
+        tool_names = list(tool_routes)
+
+        unknown = sorted(set(cache_ttls or {}) - set(tool_routes))
+        if unknown:
+            raise ValueError(f"cache_ttls names tools that are not exposed: {', '.join(unknown)}")
+        # Lifetimes left empty (e.g. a bare key in a YAML manifest) fall back to the default
+        cache_ttls = {tool: ttl for tool, ttl in (cache_ttls or {}).items() if ttl is not None}
+        if batch_tool and BATCH_TOOL_NAME in tool_routes:
+            raise ValueError(f"A selected tool is exposed as '{BATCH_TOOL_NAME}', which batch_tool needs; alias it")
 
         # Group tools by server
         tools_by_server = {}
@@ -36,7 +162,26 @@ class CodeGenerator:
             server = tool.get('server', 'unknown')
             if server not in tools_by_server:
                 tools_by_server[server] = []
-            tools_by_server[server].append(tool['name'])
+            if tool['name'] not in tools_by_server[server]:
+                tools_by_server[server].append(tool['name'])
+
+        # Schemas of the selected tools as seen during selection, under their exposed names
+        exposed_names = {route: name for name, route in tool_routes.items()}
+        tool_snapshot = {}
+        snapshot_incomplete = []
+        for tool in selected_tools:
+            server = tool.get('server', 'unknown')
+            exposed_name = exposed_names.get((server, tool['name']))
+            snapshot = tool_snapshot.setdefault(server, [])
+            if exposed_name is None or any(entry['name'] == exposed_name for entry in snapshot):
+                continue
+            # Tools given by name only are still fetched from the backend
+            if 'inputSchema' not in tool and server not in snapshot_incomplete:
+                snapshot_incomplete.append(server)
+            entry = {key: value for key, value in tool.items() if key != 'server'}
+            entry['name'] = exposed_name
+            entry.setdefault('inputSchema', {'type': 'object'})
+            snapshot.append(entry)
 
         wrapper_code = f'''#!/usr/bin/env python3
 """
@@ -44,21 +189,251 @@ Filtered MCP Server Wrapper
 Auto-generated by mcp-filter
 Combines tools from multiple MCP servers
 """
+import asyncio
+import bisect
+import itertools
 import json
+import logging.handlers
 import os
+import queue
+import random
 import re
-import subprocess
+import shlex
 import sys
-from typing import Dict, List
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional
+
+# Use orjson for the hot path when installed, unless MCP_FILTER_FAST_JSON=0
+try:
+    if os.environ.get("MCP_FILTER_FAST_JSON", "1") == "0":
+        raise ImportError
+    import orjson
+
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(value) -> bytes:
+        return json.dumps(value).encode()
 
 ALLOWED_TOOLS = {json.dumps(tool_names, indent=4)}
 
 # Server configurations
-SERVERS = {json.dumps(server_commands, indent=4)}
+SERVERS = json.loads({json.dumps(server_commands, separators=(',', ':'))!r})
 
 # Tools grouped by server
 TOOLS_BY_SERVER = {json.dumps(tools_by_server, indent=4)}
 
+# Exposed tool name -> [server, original tool name]
+TOOL_ROUTES = {json.dumps(tool_routes, indent=4)}
+
+# Per-server startup deadlines in seconds
+STARTUP_TIMEOUTS = {json.dumps(startup_timeouts or {}, indent=4)}
+
+# Selected tools' schemas at generation time, keyed by server, under their exposed names
+TOOL_SNAPSHOT = json.loads({json.dumps(tool_snapshot, separators=(',', ':'), sort_keys=True)!r})
+
+# Servers whose snapshot lacks some input schemas, so their tools are fetched live
+SNAPSHOT_INCOMPLETE = {json.dumps(snapshot_incomplete)}
+
+# Start backends on their first tool call rather than at launch
+LAZY_START = {lazy_start!r}
+
+# Seconds to cache each tool's results, by exposed tool name
+CACHE_TTLS = json.loads({json.dumps(cache_ttls, separators=(',', ':'))!r})
+
+# Meta-tool running several tool calls concurrently, or None if not generated
+BATCH_TOOL = {(BATCH_TOOL_NAME if batch_tool else None)!r}
+
+# Include/exclude patterns selecting the backends' resources and prompts
+RESOURCE_FILTER = {json.dumps(resource_filter or {})}
+PROMPT_FILTER = {json.dumps(prompt_filter or {})}
+
+# Capabilities each backend announced at generation time; servers missing here are unknown
+SERVER_CAPABILITIES = json.loads({json.dumps(server_capabilities or {}, separators=(',', ':'))!r})
+
+# Resource and prompt capabilities offered to the client: those some backend
+# announced, or may have because its capabilities are unknown
+ITEM_CAPABILITIES = [
+    capability for capability in ("resources", "prompts")
+    if any(capability in SERVER_CAPABILITIES.get(server_name, {{capability: {{}}}}) for server_name in TOOLS_BY_SERVER)
+]
+
+# List method -> (backend capability, result key, filter, fields matched by the
+# filter; the first field identifies an item when routing requests)
+LIST_METHODS = {{
+    "resources/list": ("resources", "resources", RESOURCE_FILTER, ("uri", "name")),
+    "resources/templates/list": ("resources", "resourceTemplates", RESOURCE_FILTER, ("uriTemplate", "name")),
+    "prompts/list": ("prompts", "prompts", PROMPT_FILTER, ("name",)),
+}}
+
+# Requests about one resource or prompt, routed to the backend that lists it
+ITEM_METHODS = ("resources/read", "resources/subscribe", "resources/unsubscribe", "prompts/get", "completion/complete")
+
+# Exposed tool names keyed by server and original tool name
+EXPOSED_NAMES = {{}}
+for _exposed, (_server, _original) in TOOL_ROUTES.items():
+    EXPOSED_NAMES.setdefault(_server, {{}})[_original] = _exposed
+
+# Maximum size of a single JSON-RPC line read from a backend or the client
+STREAM_LIMIT = 64 * 1024 * 1024
+
+# Backend lines longer than this are spooled to a temporary file as they arrive
+# and copied to the client in chunks, instead of being held in memory
+SPOOL_BYTES = int(os.environ.get("MCP_FILTER_SPOOL_BYTES", str(1024 * 1024)))
+
+# Size of the chunks spooled responses are scanned and copied in
+COPY_CHUNK = 64 * 1024
+
+# Bytes at each end of a spooled response searched for its id
+ID_SEARCH_BYTES = 4096
+
+# Seconds to wait for a backend to answer a request before failing it
+REQUEST_TIMEOUT = float(os.environ.get("MCP_FILTER_REQUEST_TIMEOUT", "300"))
+
+# Seconds a backend may take to start and complete its handshake
+STARTUP_TIMEOUT = float(os.environ.get("MCP_FILTER_STARTUP_TIMEOUT", "60"))
+
+# Unix socket of a shared backend pool (python -m mcp_filter --pool) to attach to
+POOL_SOCKET = os.environ.get("MCP_FILTER_POOL_SOCKET")
+
+# Seconds between health-check pings to each backend (0 disables pinging)
+PING_INTERVAL = float(os.environ.get("MCP_FILTER_PING_INTERVAL", "30"))
+
+# Seconds a backend may take to answer a ping before it is considered hung
+PING_TIMEOUT = float(os.environ.get("MCP_FILTER_PING_TIMEOUT", "10"))
+
+# Consecutive failed restarts before a backend is given up on (0 disables restarts)
+MAX_RESTARTS = int(os.environ.get("MCP_FILTER_MAX_RESTARTS", "5"))
+
+# Seconds before the first restart; doubled after each consecutive failure
+RESTART_BACKOFF = float(os.environ.get("MCP_FILTER_RESTART_BACKOFF", "1"))
+RESTART_BACKOFF_MAX = 30.0
+
+# Seconds a backend must stay up for its restart count to reset
+RESTART_RESET_AFTER = 60.0
+
+# Seconds without tool calls before a lazily started backend is stopped (0 keeps it running)
+IDLE_TIMEOUT = float(os.environ.get("MCP_FILTER_IDLE_TIMEOUT", "300"))
+
+# Client requests forwarded to one backend at a time (0 means unlimited)
+MAX_CONCURRENCY = int(os.environ.get("MCP_FILTER_MAX_CONCURRENCY", "16"))
+
+# Requests that may wait for a free slot on one backend before overflow applies
+MAX_QUEUE = int(os.environ.get("MCP_FILTER_MAX_QUEUE", "64"))
+
+# What to do with a request when a backend's queue is full: "reject" or "wait"
+QUEUE_OVERFLOW = os.environ.get("MCP_FILTER_QUEUE_OVERFLOW", "reject")
+
+# Client messages handled at once; stdin is not read while this many are in progress
+MAX_IN_FLIGHT = int(os.environ.get("MCP_FILTER_MAX_IN_FLIGHT", "256"))
+
+# Seconds to cache results of tools annotated readOnlyHint, unless set in CACHE_TTLS
+CACHE_TTL = float(os.environ.get("MCP_FILTER_CACHE_TTL", "30"))
+
+# Maximum number of cached tool results (0 disables the response cache)
+CACHE_SIZE = int(os.environ.get("MCP_FILTER_CACHE_SIZE", "256"))
+
+# Prometheus text file the metrics are written to periodically (unset disables)
+METRICS_FILE = os.environ.get("MCP_FILTER_METRICS_FILE")
+
+# Seconds between metrics file writes
+METRICS_INTERVAL = float(os.environ.get("MCP_FILTER_METRICS_INTERVAL", "15"))
+
+# Local port serving the metrics over HTTP on 127.0.0.1 (unset disables)
+METRICS_PORT = int(os.environ.get("MCP_FILTER_METRICS_PORT", "0"))
+
+# File receiving one JSON line per client request/response pair (unset disables tracing)
+TRACE_FILE = os.environ.get("MCP_FILTER_TRACE_FILE")
+
+# Fraction of request/response pairs written to the trace
+TRACE_SAMPLE = float(os.environ.get("MCP_FILTER_TRACE_SAMPLE", "1"))
+
+# Trace payloads: "off" records sizes only, "redacted" or "full" add params and results
+TRACE_PAYLOADS = os.environ.get("MCP_FILTER_TRACE_PAYLOADS", "off")
+
+# Payload keys containing any of these words are redacted in "redacted" mode
+TRACE_REDACT = [
+    word.strip().lower()
+    for word in os.environ.get("MCP_FILTER_TRACE_REDACT", "authorization,key,password,secret,token").split(",")
+    if word.strip()
+]
+
+# Size in bytes at which the trace file is rotated, and how many old files to keep
+TRACE_MAX_BYTES = int(os.environ.get("MCP_FILTER_TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.environ.get("MCP_FILTER_TRACE_BACKUPS", "3"))
+
+# Prefix of the ids sent to backends; unique per process so responses can be
+# recognised in raw bytes without parsing them
+ID_NONCE = "mcpf-" + os.urandom(4).hex()
+BACKEND_ID_PATTERN = re.compile(rb'"id"\\s*:\\s*"(' + re.escape(ID_NONCE.encode()) + rb'-\\d+)"')
+
+# Marks a failed response without parsing it; inside JSON strings the quotes are escaped
+FAILURE_PATTERN = re.compile(rb'"(?:isError"\\s*:\\s*true|error"\\s*:\\s*\\{{)')
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Compare each backend's live tool schemas with the snapshot after it starts
+SCHEMA_CHECK = os.environ.get("MCP_FILTER_SCHEMA_CHECK", "") not in ("", "0")
+
+# Most calls one batch_call may contain
+MAX_BATCH_CALLS = int(os.environ.get("MCP_FILTER_MAX_BATCH_CALLS", "32"))
+
+BATCH_TOOL_SCHEMA = {{
+    "name": BATCH_TOOL,
+    "description": (
+        "Call several of this server's tools concurrently in one request. Results are "
+        "returned in the order of 'calls'; a failed call is reported in its own entry "
+        "without affecting the others."
+    ),
+    "inputSchema": {{
+        "type": "object",
+        "properties": {{
+            "calls": {{
+                "type": "array",
+                "minItems": 1,
+                "maxItems": MAX_BATCH_CALLS,
+                "items": {{
+                    "type": "object",
+                    "properties": {{
+                        "name": {{"type": "string", "description": "Tool to call"}},
+                        "arguments": {{"type": "object", "description": "Arguments for the tool"}}
+                    }},
+                    "required": ["name"]
+                }}
+            }}
+        }},
+        "required": ["calls"]
+    }}
+}}
+
+def pattern_matches(server_name: str, subject: str, pattern: str) -> bool:
+    """Match a shell-style pattern, optionally qualified as '<server>:<pattern>'."""
+    prefix, separator, rest = pattern.partition(":")
+    if separator and prefix in SERVERS:
+        return prefix == server_name and fnmatchcase(subject, rest)
+    return fnmatchcase(subject, pattern)
+
+def item_allowed(server_name: str, item: dict, item_filter: dict, fields) -> bool:
+    """Apply a resource or prompt filter to one listed item."""
+    subjects = [str(item[field]) for field in fields if item.get(field) is not None]
+
+    def matches(patterns):
+        return any(pattern_matches(server_name, subject, pattern) for pattern in patterns for subject in subjects)
+
+    return matches(item_filter.get("include") or ["*"]) and not matches(item_filter.get("exclude") or [])
+
+def template_pattern(uri_template: str):
+    """Compile a URI template into a regex matching the URIs it expands to."""
+    parts = re.split(r"\\{{[^}}]*\\}}", uri_template)
+    return re.compile(".+".join(re.escape(part) for part in parts))
+
 def replace_env_variables(command: str) -> str:
     """Replace <VARIABLE> placeholders with environment variable values."""
     def replacer(match):
@@ -71,169 +446,1577 @@ def replace_env_variables(command: str) -> str:
 
     return re.sub(r'<([A-Z_][A-Z0-9_]*)>', replacer, command)
 
+def resolve_target(target) -> dict:
+    """
+    Turn a server command or launch spec into a launch spec with placeholders filled.
+
+    Commands are split before filling so values with spaces or quotes stay one
+    argument, and every field of a spec is filled separately.
+    """
+    if isinstance(target, str):
+        target = {{"argv": shlex.split(target)}}
+    resolved = {{"argv": [replace_env_variables(arg) for arg in target["argv"]]}}
+    if target.get("env"):
+        resolved["env"] = {{key: replace_env_variables(str(value)) for key, value in target["env"].items()}}
+    for key in ("cwd", "executable"):
+        if target.get(key):
+            resolved[key] = replace_env_variables(target[key])
+    return resolved
+
+def spawn_kwargs(spec: dict) -> dict:
+    """Arguments for create_subprocess_exec that start a resolved launch spec."""
+    return {{
+        "args": spec["argv"],
+        "executable": spec.get("executable"),
+        "env": dict(os.environ, **spec["env"]) if spec.get("env") else None,
+        "cwd": spec.get("cwd"),
+    }}
+
+def cache_ttl(tool_name: str) -> float:
+    """Seconds to cache a tool's results, 0 if it is not cached."""
+    if CACHE_SIZE <= 0:
+        return 0
+    if tool_name in CACHE_TTLS:
+        return CACHE_TTLS[tool_name]
+    for tools in TOOL_SNAPSHOT.values():
+        for tool in tools:
+            if tool["name"] == tool_name and (tool.get("annotations") or {{}}).get("readOnlyHint"):
+                return CACHE_TTL
+    return 0
+
+def is_idempotent(tool_name: str) -> bool:
+    """Whether identical concurrent calls of a tool may share one backend call."""
+    if CACHE_TTLS.get(tool_name, 0) > 0:
+        return True
+    for tools in TOOL_SNAPSHOT.values():
+        for tool in tools:
+            if tool["name"] == tool_name:
+                annotations = tool.get("annotations") or {{}}
+                return bool(annotations.get("readOnlyHint") or annotations.get("idempotentHint"))
+    return False
+
+def call_key(tool_name: str, arguments) -> str:
+    """Identify a tool call by its name and canonicalized arguments."""
+    return json.dumps([tool_name, arguments or {{}}], sort_keys=True, separators=(",", ":"))
+
+class Histogram:
+    """Latency histogram with fixed buckets, in the Prometheus style."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[tuple]:
+        """Return (upper bound, count of observations at or below it) pairs."""
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        return list(zip(bounds, itertools.accumulate(self.counts)))
+
+class Metrics:
+    """Counters, gauges and latency histograms describing proxy traffic."""
+
+    def __init__(self):
+        # Values keyed by (metric name, sorted label pairs)
+        self.counters = {{}}
+        self.gauges = {{}}
+        self.histograms = {{}}
+
+    def inc(self, name: str, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+    def set(self, name: str, value: float, **labels):
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def to_json(self) -> dict:
+        """Return all metrics as a JSON-serializable dict."""
+        def series(values):
+            return [dict(labels, name=name, value=value) for (name, labels), value in sorted(values.items())]
+
+        return {{
+            "counters": series(self.counters),
+            "gauges": series(self.gauges),
+            "histograms": [
+                dict(labels, name=name, count=histogram.count, sum=histogram.sum, buckets=dict(histogram.cumulative()))
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+        }}
+
+    def to_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        def labels_text(labels, extra=()):
+            pairs = [
+                (key, str(value).replace("\\\\", "\\\\\\\\").replace('"', '\\\\"').replace("\\n", "\\\\n"))
+                for key, value in list(labels) + list(extra)
+            ]
+            if not pairs:
+                return ""
+            return "{{" + ",".join(f'{{key}}="{{value}}"' for key, value in pairs) + "}}"
+
+        lines = []
+        for kind, values in (("counter", self.counters), ("gauge", self.gauges)):
+            typed = set()
+            for (name, labels), value in sorted(values.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {{name}} {{kind}}")
+                    typed.add(name)
+                lines.append(f"{{name}}{{labels_text(labels)}} {{value}}")
+        typed = set()
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {{name}} histogram")
+                typed.add(name)
+            for bound, count in histogram.cumulative():
+                lines.append(f"{{name}}_bucket{{labels_text(labels, [('le', bound)])}} {{count}}")
+            lines.append(f"{{name}}_sum{{labels_text(labels)}} {{histogram.sum}}")
+            lines.append(f"{{name}}_count{{labels_text(labels)}} {{histogram.count}}")
+        return "\\n".join(lines) + "\\n"
+
+def redact(value):
+    """Replace values stored under sensitive-looking keys."""
+    if isinstance(value, dict):
+        return {{
+            key: "[REDACTED]" if any(word in str(key).lower() for word in TRACE_REDACT) else redact(item)
+            for key, item in value.items()
+        }}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+class TraceWriter:
+    """
+    Append trace records to a size-rotated JSON lines file from a background thread.
+
+    The event loop only enqueues records; serialization, redaction and file
+    I/O happen on the writer thread. Records are dropped rather than
+    blocking the proxy when the queue is full.
+    """
+
+    def __init__(self, path: str):
+        self.handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, delay=True
+        )
+        self.records = queue.Queue(maxsize=10000)
+        self.thread = threading.Thread(target=self.run, name="trace-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, record: dict, request: dict, response) -> bool:
+        """Queue a record for writing; return False if it had to be dropped."""
+        try:
+            self.records.put_nowait((record, request, response))
+        except queue.Full:
+            return False
+        return True
+
+    def run(self):
+        while True:
+            item = self.records.get()
+            if item is None:
+                break
+            try:
+                self.handler.emit(logging.makeLogRecord({{"msg": self.format(*item)}}))
+            except Exception as e:
+                print(f"Could not write trace record: {{e}}", file=sys.stderr)
+
+    def format(self, record: dict, request: dict, response) -> str:
+        if isinstance(response, bytes):
+            response = json.loads(response)
+        elif isinstance(response, RawResponse):
+            response = response.parse()
+        elif isinstance(response, SpooledResponse):
+            # Too large to parse here; its failure was already scanned for when it arrived
+            response = {{"result": {{"isError": response.failed(), "spooledBytes": response.size}}}}
+        error = response.get("error")
+        result = response.get("result")
+        if error is not None:
+            record["error"] = error.get("code")
+        elif isinstance(result, dict) and result.get("isError"):
+            record["error"] = "tool_error"
+        if TRACE_PAYLOADS in ("redacted", "full"):
+            params, result = request.get("params"), response.get("result", error)
+            if TRACE_PAYLOADS == "redacted":
+                params, result = redact(params), redact(result)
+            record["params"] = params
+            record["result"] = result
+        return json.dumps(record, default=str)
+
+    def close(self):
+        """Write every queued record, then close the file."""
+        self.records.put(None)
+        self.thread.join(timeout=5)
+        self.handler.close()
+
+class RawResponse:
+    """
+    A backend response kept as the bytes it arrived in.
+
+    Forwarding splices the client id into the raw line instead of
+    re-serializing the whole message. The message is parsed at most once, when
+    something needs to look inside it.
+    """
+
+    __slots__ = ("line", "id_start", "id_end", "message")
+
+    def __init__(self, line: bytes, id_start: int, id_end: int):
+        self.line = line
+        self.id_start = id_start
+        self.id_end = id_end
+        self.message = None
+
+    def parse(self) -> dict:
+        if self.message is None:
+            self.message = json_loads(self.line)
+        return self.message
+
+    def encode(self, client_id) -> bytes:
+        """Return the response line with the client's id in place of the backend id."""
+        tail = self.line[self.id_end:]
+        if not tail.endswith(b"\\n"):
+            tail += b"\\n"
+        return self.line[:self.id_start] + json_dumps(client_id) + tail
+
+class SpooledResponse:
+    """
+    A backend response too large to keep in memory, held in a temporary file.
+
+    It is copied to the client in chunks with the client's id spliced in, and
+    scanned rather than parsed to tell whether it failed.
+    """
+
+    __slots__ = ("spool", "size", "id_start", "id_end", "failure")
+
+    def __init__(self, spool, size: int, id_start: int, id_end: int):
+        self.spool = spool
+        self.size = size
+        self.id_start = id_start
+        self.id_end = id_end
+        self.failure = None
+
+    def chunks(self, start: int = 0, end: Optional[int] = None):
+        """Yield the spooled bytes from start to end in COPY_CHUNK pieces."""
+        self.spool.seek(start)
+        remaining = (self.size if end is None else end) - start
+        while remaining > 0:
+            chunk = self.spool.read(min(COPY_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    def failed(self) -> bool:
+        if self.failure is None:
+            self.failure = False
+            tail = b""
+            for chunk in self.chunks():
+                if FAILURE_PATTERN.search(tail + chunk):
+                    self.failure = True
+                    break
+                tail = chunk[-32:]
+        return self.failure
+
+    def encode(self, client_id) -> bytes:
+        """Return the whole response line in memory, for batches that must embed it."""
+        return b"".join(self.chunks(0, self.id_start)) + json_dumps(client_id) + b"".join(self.chunks(self.id_end))
+
+    def parse(self) -> dict:
+        return json_loads(b"".join(self.chunks()))
+
+    def write_to_client(self, client_id) -> int:
+        """Copy the response to the client under its id and return the bytes written."""
+        flush_output()
+        out = sys.stdout.buffer
+        id_bytes = json_dumps(client_id)
+        try:
+            for chunk in self.chunks(0, self.id_start):
+                out.write(chunk)
+            out.write(id_bytes)
+            for chunk in self.chunks(self.id_end):
+                out.write(chunk)
+            out.flush()
+        except BrokenPipeError:
+            pass
+        return self.size - (self.id_end - self.id_start) + len(id_bytes)
+
+def response_failed(response) -> bool:
+    """Whether a response is a JSON-RPC error or a tool result flagged isError."""
+    if isinstance(response, SpooledResponse):
+        return response.failed()
+    if isinstance(response, RawResponse):
+        response = response.parse()
+    result = response.get("result")
+    return "error" in response or (isinstance(result, dict) and bool(result.get("isError")))
+
+def response_result(response):
+    """The result of a response message or raw response, or None."""
+    if isinstance(response, (RawResponse, SpooledResponse)):
+        response = response.parse()
+    return response.get("result")
+
+def encode_response(response, client_id) -> bytes:
+    """Serialize a response for the client under the client's request id."""
+    if isinstance(response, bytes):
+        return response
+    if isinstance(response, (RawResponse, SpooledResponse)):
+        return response.encode(client_id)
+    return json_dumps(response) + b"\\n"
+
+class ResponseCache:
+    """Least-recently-used cache of tool call results with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a cached result, or None if missing or expired."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: dict, ttl: float):
+        """Cache a result for ttl seconds, evicting the least recently used entries."""
+        self.entries[key] = (time.monotonic() + ttl, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
 class MultiServerProxy:
     def __init__(self):
+        # Backend (reader, writer) streams, and the processes this wrapper owns
+        self.streams = {{}}
         self.processes = {{}}
-        self.request_id = 0
+        self.startups = {{}}
+        self.supervisors = {{}}
+        self.stopping = {{}}
+        self.ready = set()
+        self.closing = False
+        # Client tool calls in flight per backend, and when each backend was last used
+        self.active_calls = {{}}
+        self.last_used = {{}}
+        # Per-backend concurrency slots, and how many requests wait for one
+        self.slots = {{}}
+        self.queued = {{}}
+        self.metrics = Metrics()
+        self.tracer = TraceWriter(TRACE_FILE) if TRACE_FILE else None
+        # Filtered tool list of each backend, and the merged result serialized once
+        # Serve the generation-time snapshot so tools/list never waits on a backend
+        self.tool_slices = {{
+            server_name: list(TOOL_SNAPSHOT.get(server_name, []))
+            for server_name in TOOLS_BY_SERVER
+            if LAZY_START or server_name not in SNAPSHOT_INCOMPLETE
+        }}
+        self.tool_refreshes = {{}}
+        self.schema_checks = {{}}
+        # Results of read-only tool calls, keyed by tool name and arguments
+        self.response_cache = ResponseCache(CACHE_SIZE)
+        # Per-tool cache lifetimes, resolved once from CACHE_TTLS and the snapshot
+        self.cache_ttls = {{tool_name: cache_ttl(tool_name) for tool_name in TOOL_ROUTES}}
+        # Calls of idempotent tools in progress, shared by identical later calls
+        self.idempotent = {{tool_name: is_idempotent(tool_name) for tool_name in TOOL_ROUTES}}
+        self.shared_calls = {{}}
+        self.tools_payload = None
+        # Capabilities each backend announced, and its filtered resources, templates
+        # and prompts keyed by (server, list method), each also indexed by identifier
+        self.capabilities = {{}}
+        self.item_lists = {{}}
+        self.item_index = {{}}
+        self.client_initialized = False
+        self.locks = {{}}
+        self.readers = {{}}
+        self.id_counters = {{}}
+        # (client id, future) of requests awaiting a backend response,
+        # keyed by (server name, backend id); internal requests have no client id
+        self.pending = {{}}
+        # (server name, progress token) of client requests in flight, whose
+        # notifications/progress are passed through to the client
+        self.progress_tokens = set()
 
     def start_servers(self):
-        """Start all required MCP servers."""
-        for server_name, command in SERVERS.items():
+        """Launch all required MCP servers concurrently without waiting for them."""
+        if LAZY_START:
+            return
+        for server_name in SERVERS:
             if server_name in TOOLS_BY_SERVER:
+                self.ensure_started(server_name)
+
+    def ensure_started(self, server_name: str):
+        """Launch a backend and its supervisor unless they are already running."""
+        if server_name not in self.startups:
+            self.startups[server_name] = asyncio.ensure_future(self.start_server(server_name))
+            self.supervisors[server_name] = asyncio.ensure_future(self.supervise(server_name))
+
+    async def supervise(self, server_name: str):
+        """
+        Keep one backend running: watch for exits and hangs, and restart it.
+
+        Restarts back off exponentially while they keep failing. Requests in
+        flight when a backend goes down are failed rather than replayed, since
+        a tool call may already have had side effects; requests arriving during
+        a restart wait for it to finish.
+        """
+        loop = asyncio.get_running_loop()
+        failures = 0
+        while True:
+            started = await self.startups[server_name]
+            if started:
+                started_at = loop.time()
+                if await self.monitor(server_name):
+                    await self.stop_idle(server_name)
+                    return
+            if self.closing:
+                return
+
+            if started and loop.time() - started_at >= RESTART_RESET_AFTER:
+                failures = 0
+            failures += 1
+            if failures > MAX_RESTARTS:
+                print(f"Giving up on {{server_name}} after {{failures - 1}} restart(s)", file=sys.stderr)
+                await self.stop_server(server_name)
+                return
+
+            delay = min(RESTART_BACKOFF * 2 ** (failures - 1), RESTART_BACKOFF_MAX)
+            print(f"{{server_name}} is down, restarting in {{delay:g}}s", file=sys.stderr)
+            self.metrics.inc("mcp_filter_backend_restarts_total", server=server_name)
+            # Swap in the restart before any await so new requests wait for it
+            self.startups[server_name] = asyncio.ensure_future(self.restart_server(server_name, delay))
+
+    async def restart_server(self, server_name: str, delay: float) -> bool:
+        """Clean up a failed backend and start it again after a backoff delay."""
+        # Keep the tool slice so tools/list stays stable across the restart
+        await self.stop_server(server_name, keep_tools=True)
+        await asyncio.sleep(delay)
+        return await self.start_server(server_name)
+
+    async def monitor(self, server_name: str) -> bool:
+        """
+        Return once a backend has exited, stopped answering pings or gone idle.
+
+        Returns:
+            True if a lazily started backend went unused for IDLE_TIMEOUT seconds
+        """
+        loop = asyncio.get_running_loop()
+        reader = self.readers.get(server_name)
+        next_ping = loop.time() + PING_INTERVAL
+        while reader is not None and not reader.done():
+            deadlines = []
+            if PING_INTERVAL > 0:
+                deadlines.append(next_ping)
+            if LAZY_START and IDLE_TIMEOUT > 0:
+                if self.active_calls.get(server_name):
+                    idle_at = loop.time() + IDLE_TIMEOUT
+                else:
+                    idle_at = self.last_used.get(server_name, loop.time()) + IDLE_TIMEOUT
+                if loop.time() >= idle_at:
+                    return True
+                deadlines.append(idle_at)
+
+            timeout = max(0, min(deadlines) - loop.time()) if deadlines else None
+            done, _ = await asyncio.wait({{reader}}, timeout=timeout)
+            if done:
+                return False
+
+            if PING_INTERVAL > 0 and loop.time() >= next_ping:
+                next_ping = loop.time() + PING_INTERVAL
                 try:
-                    # Replace environment variable placeholders
-                    final_command = replace_env_variables(command)
-
-                    process = subprocess.Popen(
-                        final_command.split(),
-                        stdin=subprocess.PIPE,
-                        stdout=subprocess.PIPE,
-                        stderr=sys.stderr,
-                        text=True,
-                        bufsize=1
-                    )
-
-                    # Initialize the server
-                    init_request = {{
-                        "jsonrpc": "2.0",
-                        "id": 1,
-                        "method": "initialize",
-                        "params": {{
-                            "protocolVersion": "2024-11-05",
-                            "capabilities": {{}},
-                            "clientInfo": {{"name": "mcp-filter", "version": "1.0.0"}}
-                        }}
-                    }}
-                    process.stdin.write(json.dumps(init_request) + "\\n")
-                    process.stdin.flush()
-                    process.stdout.readline()  # Read init response
-
-                    # Send initialized notification
-                    initialized = {{"jsonrpc": "2.0", "method": "notifications/initialized"}}
-                    process.stdin.write(json.dumps(initialized) + "\\n")
-                    process.stdin.flush()
-
-                    self.processes[server_name] = process
-                except Exception as e:
-                    print(f"Failed to start {{server_name}}: {{e}}", file=sys.stderr)
-
-    def get_all_tools(self):
-        """Retrieve all allowed tools from all servers."""
-        all_tools = []
-        for server_name, process in self.processes.items():
-            try:
-                tools_request = {{
-                    "jsonrpc": "2.0",
-                    "id": self.request_id,
-                    "method": "tools/list",
-                    "params": {{}}
-                }}
-                self.request_id += 1
+                    await self.request(server_name, {{"jsonrpc": "2.0", "method": "ping"}}, timeout=PING_TIMEOUT)
+                except TimeoutError:
+                    print(f"{{server_name}} did not answer a ping within {{PING_TIMEOUT:g}}s", file=sys.stderr)
+                    return False
+                except Exception:
+                    return False
+        return False
+
+    async def stop_idle(self, server_name: str):
+        """Stop an unused backend; its next tool call starts it again."""
+        print(f"Stopping {{server_name}} after {{IDLE_TIMEOUT:g}}s without tool calls", file=sys.stderr)
+        # Forget the backend first so a new call relaunches it once this stop completes
+        stopping = asyncio.ensure_future(self.stop_server(server_name, keep_tools=True))
+        self.stopping[server_name] = stopping
+        self.startups.pop(server_name, None)
+        self.supervisors.pop(server_name, None)
+        try:
+            await stopping
+        finally:
+            if self.stopping.get(server_name) is stopping:
+                del self.stopping[server_name]
+        self.notify_items_changed(server_name)
 
-                process.stdin.write(json.dumps(tools_request) + "\\n")
-                process.stdin.flush()
+    async def start_server(self, server_name: str) -> bool:
+        """Start and handshake one backend within its startup deadline."""
+        stopping = self.stopping.get(server_name)
+        if stopping is not None:
+            # An idle stop of the previous process is still in progress
+            await asyncio.shield(stopping)
 
-                response_line = process.stdout.readline()
-                response = json.loads(response_line)
+        timeout = STARTUP_TIMEOUTS.get(server_name, STARTUP_TIMEOUT)
+        try:
+            await asyncio.wait_for(self.launch(server_name), timeout)
+        except asyncio.TimeoutError:
+            print(f"Failed to start {{server_name}}: no handshake within {{timeout:g}}s", file=sys.stderr)
+            await self.stop_server(server_name)
+            return False
+        except Exception as e:
+            print(f"Failed to start {{server_name}}: {{e}}", file=sys.stderr)
+            await self.stop_server(server_name)
+            return False
 
-                if "result" in response and "tools" in response["result"]:
-                    server_tools = [
-                        tool for tool in response["result"]["tools"]
-                        if tool["name"] in TOOLS_BY_SERVER.get(server_name, [])
-                    ]
-                    all_tools.extend(server_tools)
+        if server_name in SNAPSHOT_INCOMPLETE:
+            try:
+                await self.fetch_tools(server_name)
             except Exception as e:
                 print(f"Error getting tools from {{server_name}}: {{e}}", file=sys.stderr)
+        elif SCHEMA_CHECK:
+            self.schema_checks[server_name] = asyncio.ensure_future(self.check_schema_drift(server_name))
+
+        self.ready.add(server_name)
+        self.last_used[server_name] = asyncio.get_running_loop().time()
+        if server_name in SNAPSHOT_INCOMPLETE:
+            self.notify_client({{"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}})
+        if LAZY_START:
+            # Lists served before this backend started left its items out
+            self.notify_items_changed(server_name)
+        return True
 
-        return all_tools
+    async def launch(self, server_name: str):
+        """Connect to a backend and run the MCP initialize handshake."""
+        spec = resolve_target(SERVERS[server_name])
+        streams = None
+        if POOL_SOCKET:
+            streams = await self.attach_to_pool(server_name, spec)
+        if streams is None:
+            kwargs = spawn_kwargs(spec)
+            process = await asyncio.create_subprocess_exec(
+                *kwargs.pop("args"),
+                **kwargs,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=sys.stderr,
+                limit=SPOOL_BYTES
+            )
+            self.processes[server_name] = process
+            streams = (process.stdout, process.stdin)
 
-    def route_request(self, request):
+        self.streams[server_name] = streams
+        self.locks[server_name] = asyncio.Lock()
+        self.id_counters[server_name] = itertools.count(1)
+        self.readers[server_name] = asyncio.ensure_future(self.read_backend(server_name))
+
+        # Initialize the server
+        init_request = {{
+            "jsonrpc": "2.0",
+            "method": "initialize",
+            "params": {{
+                "protocolVersion": "2024-11-05",
+                "capabilities": {{}},
+                "clientInfo": {{"name": "mcp-filter", "version": "1.0.0"}}
+            }}
+        }}
+        response = await self.request(server_name, init_request)
+        self.capabilities[server_name] = (response.get("result") or {{}}).get("capabilities") or {{}}
+
+        # Send initialized notification
+        initialized = {{"jsonrpc": "2.0", "method": "notifications/initialized"}}
+        await self.send(server_name, initialized)
+
+    async def attach_to_pool(self, server_name: str, spec: dict):
+        """Attach to the shared backend pool, or return None to spawn privately."""
+        try:
+            reader, writer = await asyncio.open_unix_connection(POOL_SOCKET, limit=SPOOL_BYTES)
+        except OSError as e:
+            print(f"Backend pool unavailable for {{server_name}} ({{e}}), starting it locally", file=sys.stderr)
+            return None
+        writer.write((json.dumps({{"attach": spec}}) + "\\n").encode())
+        await writer.drain()
+        return reader, writer
+
+    async def wait_ready(self, server_name: str) -> bool:
+        """Wait for a backend to finish starting; return whether it is usable."""
+        startup = self.startups.get(server_name)
+        if startup is None:
+            return False
+        # Shield the startup so a cancelled caller does not abort it for everyone
+        return await asyncio.shield(startup) and server_name in self.ready
+
+    def notify_client(self, notification: dict):
+        """Send a notification to the client once it has finished initializing."""
+        if self.client_initialized:
+            write_message(notification)
+
+    async def send(self, server_name: str, message: dict):
+        """Write one JSON-RPC message to a backend."""
+        writer = self.streams[server_name][1]
+        async with self.locks[server_name]:
+            writer.write(json_dumps(message) + b"\\n")
+            await writer.drain()
+
+    async def request(self, server_name: str, message: dict, timeout: float = REQUEST_TIMEOUT, raw: bool = False):
+        """
+        Send a request to a backend and wait for the response with the same id.
+
+        The client id is replaced by a backend-unique id on the way out and
+        restored on the response, so any number of requests can be in flight
+        on one backend and answered in any order. With raw=True the response
+        may be returned as a RawResponse or SpooledResponse, to be encoded
+        with the client id when it is written.
+        """
+        reader = self.readers.get(server_name)
+        if reader is None or reader.done():
+            raise ConnectionError(f"{{server_name}} is not running")
+
+        backend_id = f"{{ID_NONCE}}-{{next(self.id_counters[server_name])}}"
+        key = (server_name, backend_id)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = (message.get("id"), future)
+        # Progress the backend reports for this request is forwarded until it is answered
+        token = ((message.get("params") or {{}}).get("_meta") or {{}}).get("progressToken")
+        progress_key = None
+        if isinstance(token, (str, int)) and (server_name, token) not in self.progress_tokens:
+            progress_key = (server_name, token)
+            self.progress_tokens.add(progress_key)
+
+        try:
+            await self.send(server_name, dict(message, id=backend_id))
+            response = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            # Tell the backend to stop working on the abandoned request
+            await self.send_cancelled(server_name, backend_id, "Request timed out")
+            raise TimeoutError(f"{{server_name}} did not answer within {{timeout:g}}s")
+        finally:
+            # Evict the entry whether it was answered, timed out or abandoned
+            self.pending.pop(key, None)
+            self.progress_tokens.discard(progress_key)
+
+        if isinstance(response, (RawResponse, SpooledResponse)):
+            if raw:
+                return response
+            response = response.parse()
+        return dict(response, id=message.get("id"))
+
+    async def send_cancelled(self, server_name: str, backend_id: str, reason: str):
+        """Send a best-effort cancellation for a request to a backend."""
+        try:
+            await self.send(server_name, {{
+                "jsonrpc": "2.0",
+                "method": "notifications/cancelled",
+                "params": {{"requestId": backend_id, "reason": reason}}
+            }})
+        except Exception as e:
+            print(f"Could not cancel request on {{server_name}}: {{e}}", file=sys.stderr)
+
+    async def cancel_request(self, notification: dict):
+        """Forward a client cancellation to the backend handling that request."""
+        params = notification.get("params") or {{}}
+        client_id = params.get("requestId")
+        # A batch_call has one pending backend request per call, all under its id
+        for key, (pending_client_id, future) in list(self.pending.items()):
+            if client_id is not None and pending_client_id == client_id:
+                server_name, backend_id = key
+                await self.send_cancelled(server_name, backend_id, params.get("reason", "Cancelled by client"))
+                # The client expects no response for a cancelled request
+                future.cancel()
+
+    async def read_backend(self, server_name: str):
+        """Dispatch every message a backend writes until its output closes."""
+        reader = self.streams[server_name][0]
+        try:
+            while True:
+                line = await read_backend_line(reader)
+                if not line:
+                    break
+                if isinstance(line, tuple):
+                    await self.dispatch_spooled(server_name, *line)
+                    continue
+
+                # Responses to our requests are matched by their id without parsing
+                match = BACKEND_ID_PATTERN.search(line)
+                if match is not None and BACKEND_ID_PATTERN.search(line, match.end()) is None:
+                    _, future = self.pending.get((server_name, match.group(1).decode()), (None, None))
+                    if future is not None:
+                        if not future.done():
+                            future.set_result(RawResponse(line, match.start(1) - 1, match.end(1) + 1))
+                        continue
+
+                try:
+                    message = json_loads(line)
+                except ValueError:
+                    print(f"Ignoring malformed output from {{server_name}}", file=sys.stderr)
+                    continue
+                await self.dispatch_backend_message(server_name, message)
+        except Exception as e:
+            print(f"Error reading from {{server_name}}: {{e}}", file=sys.stderr)
+        finally:
+            # Later requests fail fast instead of writing into a closed pipe
+            self.ready.discard(server_name)
+            self.fail_pending(server_name, ConnectionError(f"{{server_name}} closed its output"))
+
+    async def dispatch_spooled(self, server_name: str, spool, size: int):
+        """Resolve the pending request a spooled backend line answers, or dispatch it parsed."""
+        spool.seek(0)
+        offset = 0
+        match = BACKEND_ID_PATTERN.search(spool.read(ID_SEARCH_BYTES))
+        if match is None:
+            offset = max(0, size - ID_SEARCH_BYTES)
+            spool.seek(offset)
+            match = BACKEND_ID_PATTERN.search(spool.read())
+        if match is not None:
+            _, future = self.pending.get((server_name, match.group(1).decode()), (None, None))
+            if future is not None:
+                if not future.done():
+                    future.set_result(SpooledResponse(
+                        spool, size, offset + match.start(1) - 1, offset + match.end(1) + 1
+                    ))
+                return
+
+        # Not a response we are waiting for: handle it like any other message
+        if size > STREAM_LIMIT:
+            print(f"Dropping {{size}}-byte message from {{server_name}}", file=sys.stderr)
+        else:
+            spool.seek(0)
+            try:
+                message = json_loads(spool.read())
+            except ValueError:
+                print(f"Ignoring malformed output from {{server_name}}", file=sys.stderr)
+            else:
+                await self.dispatch_backend_message(server_name, message)
+        spool.close()
+
+    async def dispatch_backend_message(self, server_name: str, message: dict):
+        """Resolve the pending request a backend response belongs to."""
+        if "method" not in message:
+            _, future = self.pending.get((server_name, message.get("id")), (None, None))
+            if future is None:
+                print(
+                    f"Dropping response from {{server_name}} for unknown or expired id {{message.get('id')}}",
+                    file=sys.stderr
+                )
+            elif not future.done():
+                future.set_result(message)
+        elif message["method"] == "notifications/tools/list_changed":
+            self.invalidate_tools(server_name)
+        elif message["method"] in ("notifications/resources/list_changed", "notifications/prompts/list_changed"):
+            self.forget_items(server_name, message["method"].split("/")[1])
+            self.notify_client({{"jsonrpc": "2.0", "method": message["method"]}})
+        elif message["method"] == "notifications/resources/updated":
+            self.notify_client(message)
+        elif message["method"] == "notifications/progress":
+            # Only progress for a request still in flight reaches the client
+            token = (message.get("params") or {{}}).get("progressToken")
+            if isinstance(token, (str, int)) and (server_name, token) in self.progress_tokens:
+                self.notify_client(message)
+        elif message["method"] == "notifications/message":
+            self.notify_client(message)
+        elif "id" in message:
+            # Server-to-client requests are not supported by the proxy
+            await self.send(server_name, error_response(
+                message["id"], -32601, f"Method {{message['method']}} not supported by mcp-filter"
+            ))
+
+    def fail_pending(self, server_name: str, error: Exception):
+        """Fail every request still waiting on a backend."""
+        for (pending_server, _), (_, future) in list(self.pending.items()):
+            if pending_server == server_name and not future.done():
+                future.set_exception(error)
+
+    async def fetch_tools(self, server_name: str) -> List[dict]:
+        """Fetch one backend's tool list, cache the allowed tools and return them."""
+        exposed_names = EXPOSED_NAMES.get(server_name, {{}})
+        server_tools = []
+        params = {{}}
+        while True:
+            tools_request = {{
+                "jsonrpc": "2.0",
+                "method": "tools/list",
+                "params": params
+            }}
+            response = await self.request(server_name, tools_request)
+            result = response.get("result", {{}})
+            for tool in result.get("tools", []):
+                exposed_name = exposed_names.get(tool["name"])
+                if exposed_name == tool["name"]:
+                    server_tools.append(tool)
+                elif exposed_name is not None:
+                    server_tools.append(dict(tool, name=exposed_name))
+            if not result.get("nextCursor"):
+                break
+            params = {{"cursor": result["nextCursor"]}}
+
+        self.tool_slices[server_name] = server_tools
+        self.tools_payload = None
+        return server_tools
+
+    async def check_schema_drift(self, server_name: str):
+        """Warn when a backend's live tools differ from the snapshot, then serve the live ones."""
+        snapshot = {{tool["name"]: tool for tool in TOOL_SNAPSHOT.get(server_name, [])}}
+        try:
+            live = {{tool["name"]: tool for tool in await self.fetch_tools(server_name)}}
+        except Exception as e:
+            print(f"Schema check for {{server_name}} failed: {{e}}", file=sys.stderr)
+            return
+
+        missing = sorted(set(snapshot) - set(live))
+        changed = sorted(name for name in live if name in snapshot and live[name] != snapshot[name])
+        if missing:
+            print(f"Schema drift in {{server_name}}: tools no longer offered: {{', '.join(missing)}}", file=sys.stderr)
+        if changed:
+            print(f"Schema drift in {{server_name}}: tools changed since generation: {{', '.join(changed)}}", file=sys.stderr)
+        if missing or changed:
+            self.notify_client({{"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}})
+
+    def invalidate_tools(self, server_name: str):
+        """
+        Refetch a backend's tools in the background.
+
+        The cached slice keeps being served until the refetch succeeds, so a
+        failed refresh never hides the backend's tools.
+        """
+        self.tool_refreshes[server_name] = asyncio.ensure_future(self.refresh_tools(server_name))
+
+    async def refresh_tools(self, server_name: str):
+        """Refetch a backend's tools and tell the client the list changed."""
+        try:
+            await self.fetch_tools(server_name)
+        except Exception as e:
+            print(f"Error getting tools from {{server_name}}: {{e}}", file=sys.stderr)
+        self.notify_client({{"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}})
+
+    async def get_all_tools(self):
+        """Return all allowed tools from the cache, in server order."""
+        refreshes = [task for task in self.tool_refreshes.values() if not task.done()]
+        if refreshes:
+            await asyncio.wait(refreshes)
+        return [tool for server_name in SERVERS for tool in self.tool_slices.get(server_name, [])]
+
+    async def list_items(self, method: str) -> list:
+        """
+        Aggregate resources, resource templates or prompts across backends, in server order.
+
+        With LAZY_START only backends already started by a tool call are asked,
+        so listing never spawns one.
+        """
+        servers = [
+            server_name for server_name in SERVERS
+            if server_name in TOOLS_BY_SERVER and (not LAZY_START or server_name in self.startups)
+        ]
+        lists = await asyncio.gather(*(self.server_items(server_name, method) for server_name in servers))
+        return [item for items in lists for item in items]
+
+    async def server_items(self, server_name: str, method: str) -> list:
+        """Return one backend's filtered items for a list method, fetching them once."""
+        key = (server_name, method)
+        if key in self.item_lists:
+            return self.item_lists[key]
+
+        capability, result_key, item_filter, fields = LIST_METHODS[method]
+        if not LAZY_START:
+            self.ensure_started(server_name)
+        if not await self.wait_ready(server_name) or capability not in self.capabilities.get(server_name, {{}}):
+            return []
+        items = []
+        params = {{}}
+        try:
+            while True:
+                response = await self.request(server_name, {{"jsonrpc": "2.0", "method": method, "params": params}})
+                result = response.get("result") or {{}}
+                items.extend(
+                    item for item in result.get(result_key, [])
+                    if item_allowed(server_name, item, item_filter, fields)
+                )
+                if not result.get("nextCursor"):
+                    break
+                params = {{"cursor": result["nextCursor"]}}
+        except Exception as e:
+            print(f"Error listing {{method}} from {{server_name}}: {{e}}", file=sys.stderr)
+            return []
+
+        self.item_lists[key] = items
+        self.item_index[key] = {{item.get(fields[0]): item for item in items}}
+        return items
+
+    def notify_items_changed(self, server_name: str):
+        """Tell the client the resource and prompt lists changed because a backend came or went."""
+        for capability in ITEM_CAPABILITIES:
+            if capability in self.capabilities.get(server_name, {{}}):
+                self.notify_client({{"jsonrpc": "2.0", "method": f"notifications/{{capability}}/list_changed"}})
+
+    def forget_items(self, server_name: str, kind: Optional[str] = None):
+        """Drop a backend's cached resources and/or prompts ('resources' or 'prompts'; None for both)."""
+        for key in list(self.item_lists):
+            if key[0] == server_name and (kind is None or key[1].startswith(kind)):
+                del self.item_lists[key]
+                del self.item_index[key]
+
+    async def find_owner(self, method: str, identifier) -> Optional[str]:
+        """Return the first backend, in server order, listing an item with this identifier."""
+        await self.list_items(method)
+        for server_name in SERVERS:
+            if identifier in self.item_index.get((server_name, method), {{}}):
+                return server_name
+        return None
+
+    async def find_resource_owner(self, uri) -> Optional[str]:
+        """Return the backend serving a resource URI, directly listed or matched by a template."""
+        server_name = await self.find_owner("resources/list", uri)
+        if server_name is None:
+            server_name = await self.find_owner("resources/templates/list", uri)
+        if server_name is None and isinstance(uri, str):
+            for candidate in SERVERS:
+                for template in self.item_lists.get((candidate, "resources/templates/list"), []):
+                    if template_pattern(template.get("uriTemplate", "")).fullmatch(uri):
+                        return candidate
+        return server_name
+
+    async def route_item_request(self, request: dict):
+        """
+        Forward a request about one resource or prompt to the backend that lists it.
+
+        Returns:
+            (response, server_name); server_name is None if no backend exposes the item
+        """
+        method = request.get("method")
+        params = request.get("params") or {{}}
+        ref = params.get("ref") or {{}}
+        if method == "prompts/get" or (method == "completion/complete" and ref.get("type") == "ref/prompt"):
+            name = params.get("name") if method == "prompts/get" else ref.get("name")
+            server_name = await self.find_owner("prompts/list", name)
+            if server_name is None:
+                return error_response(request.get("id"), -32602, f"Unknown prompt: {{name}}"), None
+        else:
+            uri = params.get("uri") if method != "completion/complete" else ref.get("uri")
+            server_name = await self.find_resource_owner(uri)
+            if server_name is None:
+                return error_response(request.get("id"), -32002, f"Resource not found: {{uri}}"), None
+
+        if not await self.wait_ready(server_name):
+            return error_response(request.get("id"), -32603, f"{{server_name}} is unavailable"), server_name
+        return await self.forward_request(server_name, request), server_name
+
+    async def get_tools_payload(self) -> bytes:
+        """Return the serialized tools/list result, rebuilding it only after a change."""
+        all_tools = await self.get_all_tools()
+        if self.tools_payload is None:
+            if BATCH_TOOL:
+                all_tools = all_tools + [BATCH_TOOL_SCHEMA]
+            self.tools_payload = json_dumps({{"tools": all_tools}})
+        return self.tools_payload
+
+    async def acquire_slot(self, server_name: str, timeout: float) -> bool:
+        """
+        Wait for a free request slot on a backend.
+
+        Returns:
+            False if the backend's queue is full and overflow is set to reject
+
+        Raises:
+            TimeoutError: If no slot frees up within the timeout
+        """
+        slots = self.slots.get(server_name)
+        if slots is None:
+            slots = self.slots[server_name] = asyncio.Semaphore(MAX_CONCURRENCY)
+        if not slots.locked():
+            # A free slot is taken without suspending, so concurrent callers see it as taken
+            await slots.acquire()
+            return True
+        if self.queued.get(server_name, 0) >= MAX_QUEUE and QUEUE_OVERFLOW != "wait":
+            return False
+
+        self.queued[server_name] = self.queued.get(server_name, 0) + 1
+        self.metrics.set("mcp_filter_queued", self.queued[server_name], server=server_name)
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"no free slot on {{server_name}} within {{timeout:g}}s")
+        finally:
+            self.queued[server_name] -= 1
+            self.metrics.set("mcp_filter_queued", self.queued[server_name], server=server_name)
+        return True
+
+    async def forward_request(self, server_name: str, request: dict) -> dict:
+        """Forward a client request to a backend, converting failures to errors."""
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        deadline = queued_at + REQUEST_TIMEOUT
+        self.active_calls[server_name] = self.active_calls.get(server_name, 0) + 1
+        self.metrics.set("mcp_filter_in_flight", self.active_calls[server_name], server=server_name)
+        self.metrics.inc("mcp_filter_backend_requests_total", server=server_name)
+        acquired = False
+        sent_at = None
+        try:
+            if MAX_CONCURRENCY > 0:
+                acquired = await self.acquire_slot(server_name, REQUEST_TIMEOUT)
+                if not acquired:
+                    self.metrics.inc("mcp_filter_backend_rejected_total", server=server_name)
+                    return error_response(request.get("id"), -32000, f"{{server_name}} is overloaded, try again later")
+            sent_at = loop.time()
+            self.metrics.observe("mcp_filter_queue_seconds", sent_at - queued_at, server=server_name)
+            # Time spent queued counts against the request timeout
+            response = await self.request(server_name, request, timeout=max(0, deadline - sent_at), raw=True)
+            if response_failed(response):
+                self.metrics.inc("mcp_filter_backend_errors_total", server=server_name)
+            return response
+        except Exception as e:
+            self.metrics.inc("mcp_filter_backend_errors_total", server=server_name)
+            return error_response(request.get("id"), -32603, f"{{server_name}} failed: {{e}}")
+        finally:
+            if sent_at is not None:
+                self.metrics.observe("mcp_filter_backend_seconds", loop.time() - sent_at, server=server_name)
+            if acquired:
+                self.slots[server_name].release()
+            self.active_calls[server_name] -= 1
+            self.metrics.set("mcp_filter_in_flight", self.active_calls[server_name], server=server_name)
+            self.last_used[server_name] = loop.time()
+
+    async def call_tool(self, route, request: dict) -> dict:
+        """Start the tool's backend if needed and forward the call to it."""
+        server_name, original_name = route
+        self.ensure_started(server_name)
+        params = request.get("params") or {{}}
+        if original_name != params.get("name"):
+            request = dict(request, params=dict(params, name=original_name))
+        if not await self.wait_ready(server_name):
+            return error_response(request.get("id"), -32603, f"{{server_name}} is unavailable")
+        return await self.forward_request(server_name, request)
+
+    def record_tool_call(self, request: dict, response: dict):
+        """Count a finished tool call and whether it failed."""
+        tool_name = str((request.get("params") or {{}}).get("name"))
+        server_name = TOOL_ROUTES.get(tool_name, ["unknown"])[0]
+        self.metrics.inc("mcp_filter_tool_calls_total", tool=tool_name, server=server_name)
+        if response_failed(response):
+            self.metrics.inc("mcp_filter_tool_errors_total", tool=tool_name, server=server_name)
+
+    def forget_shared_call(self, key: str, task: asyncio.Future):
+        """Stop offering a finished call to later identical calls."""
+        if self.shared_calls.get(key) is task:
+            del self.shared_calls[key]
+
+    async def route_request(self, request):
         """Route a tool call request to the appropriate server."""
         if request.get("method") == "tools/call":
-            tool_name = request.get("params", {{}}).get("name")
-
-            # Find which server has this tool
-            for server_name, tool_list in TOOLS_BY_SERVER.items():
-                if tool_name in tool_list and server_name in self.processes:
-                    process = self.processes[server_name]
-                    process.stdin.write(json.dumps(request) + "\\n")
-                    process.stdin.flush()
-                    response_line = process.stdout.readline()
-                    return json.loads(response_line)
-
-            return {{
+            params = request.get("params") or {{}}
+            tool_name = params.get("name")
+
+            route = TOOL_ROUTES.get(tool_name)
+            if route is None or route[0] not in SERVERS:
+                return error_response(request.get("id"), -32601, f"Tool {{tool_name}} not found")
+
+            if not self.idempotent.get(tool_name):
+                return await self.call_tool(route, request)
+
+            key = call_key(tool_name, params.get("arguments"))
+
+            # Answer repeated read-only calls without touching the backend
+            ttl = self.cache_ttls.get(tool_name, 0)
+            if ttl > 0:
+                cached = self.response_cache.get(key)
+                if cached is not None:
+                    self.metrics.inc("mcp_filter_cache_hits_total", tool=tool_name)
+                    return {{"jsonrpc": "2.0", "id": request.get("id"), "result": cached}}
+
+            # Identical idempotent calls in flight share one backend call
+            shared = self.shared_calls.get(key)
+            leader = shared is None
+            if leader:
+                shared = self.shared_calls[key] = asyncio.ensure_future(self.call_tool(route, request))
+                shared.add_done_callback(lambda task: self.forget_shared_call(key, task))
+            else:
+                self.metrics.inc("mcp_filter_coalesced_calls_total", tool=tool_name)
+            try:
+                response = await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if leader or not shared.cancelled():
+                    raise
+                # The client that started the shared call cancelled it
+                return await self.call_tool(route, request)
+
+            if leader and ttl > 0 and not isinstance(response, SpooledResponse) and not response_failed(response):
+                result = response_result(response)
+                if isinstance(result, dict):
+                    self.response_cache.put(key, result, ttl)
+            # Raw responses take the client id when written
+            if isinstance(response, (RawResponse, SpooledResponse)):
+                return response
+            return dict(response, id=request.get("id"))
+
+        return None
+
+    async def batch_call(self, request: dict) -> dict:
+        """Run the calls of a batch_call concurrently and report their results in order."""
+        calls = ((request.get("params") or {{}}).get("arguments") or {{}}).get("calls")
+        if not isinstance(calls, list) or not calls or not all(isinstance(call, dict) for call in calls):
+            return tool_error(request.get("id"), "'calls' must be a non-empty list of {{name, arguments}} objects")
+        if len(calls) > MAX_BATCH_CALLS:
+            return tool_error(request.get("id"), f"At most {{MAX_BATCH_CALLS}} calls may be batched")
+
+        async def run(call):
+            if call.get("name") == BATCH_TOOL:
+                return {{"name": BATCH_TOOL, "error": {{"code": -32602, "message": "batch_call cannot be nested"}}}}
+            # Calls share the batch's id, so cancelling the batch cancels every call
+            inner = {{
                 "jsonrpc": "2.0",
                 "id": request.get("id"),
-                "error": {{"code": -32601, "message": f"Tool {{tool_name}} not found"}}
+                "method": "tools/call",
+                "params": {{"name": call.get("name"), "arguments": call.get("arguments") or {{}}}}
             }}
+            response = await self.route_request(inner)
+            self.record_tool_call(inner, response)
+            if isinstance(response, (RawResponse, SpooledResponse)):
+                response = response.parse()
+            if "error" in response:
+                return {{"name": call.get("name"), "error": response["error"]}}
+            return {{"name": call.get("name"), "result": response.get("result")}}
 
-        return None
+        results = await asyncio.gather(*(run(call) for call in calls))
+        return {{
+            "jsonrpc": "2.0",
+            "id": request.get("id"),
+            "result": {{
+                "content": [{{"type": "text", "text": json.dumps(results)}}],
+                "structuredContent": {{"results": results}},
+                "isError": False
+            }}
+        }}
+
+    async def handle_line(self, line: bytes):
+        """Handle one client message or batch and write its response, if any."""
+        started = time.monotonic()
+        if not line.strip():
+            return
+        try:
+            request = json_loads(line)
+        except ValueError as e:
+            write_message(error_response(None, -32700, f"Parse error: {{e}}"))
+            return
+        if isinstance(request, list):
+            await self.handle_batch(request, started)
+            return
+        if not isinstance(request, dict):
+            write_message(error_response(None, -32600, "Invalid request"))
+            return
+
+        try:
+            response, server_name = await self.respond(request)
+        except Exception as e:
+            # Answer a request that failed so the client is not left waiting for it
+            print(f"Error handling request: {{e}}", file=sys.stderr)
+            if "id" not in request:
+                return
+            response, server_name = error_response(request.get("id"), -32603, str(e)), None
+        if not response:
+            return
+        if isinstance(response, SpooledResponse):
+            written = response.write_to_client(request.get("id"))
+        else:
+            data = encode_response(response, request.get("id"))
+            write_line(data)
+            written = len(data)
+        self.trace(request, response, server_name, started, len(line), written)
+
+    async def handle_batch(self, messages: list, started: float):
+        """
+        Handle a JSON-RPC batch and write all its responses as one array.
+
+        Elements are handled concurrently, each routed on its own like a single
+        message, so elements bound for different backends run in parallel.
+        """
+        if not messages:
+            write_message(error_response(None, -32600, "Invalid request: empty batch"))
+            return
+
+        async def respond(message):
+            if not isinstance(message, dict):
+                return error_response(None, -32600, "Invalid request"), None
+            return await self.respond(message)
+
+        outcomes = await asyncio.gather(*(respond(message) for message in messages), return_exceptions=True)
+        parts = []
+        for message, outcome in zip(messages, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                continue  # Cancelled requests get no response
+            if isinstance(outcome, BaseException):
+                print(f"Error handling request: {{outcome}}", file=sys.stderr)
+                if "id" not in message:
+                    continue
+                outcome = error_response(message.get("id"), -32603, str(outcome)), None
+            response, server_name = outcome
+            if not response:
+                continue
+            data = encode_response(response, message.get("id") if isinstance(message, dict) else None)
+            parts.append(data[:-1])
+            self.trace(message, response, server_name, started, None, len(data))
+
+        # A batch of notifications gets no response at all
+        if parts:
+            write_line(b"[" + b",".join(parts) + b"]\\n")
+
+    def trace(self, request: dict, response, server_name, started: float, request_bytes, response_bytes: int):
+        """Record a sampled request/response pair in the trace log."""
+        if self.tracer is None or random.random() >= TRACE_SAMPLE or not isinstance(request, dict):
+            return
+        method = request.get("method")
+        if request_bytes is None:
+            request_bytes = len(json_dumps(request))
+        traced = self.tracer.write({{
+            "ts": time.time(),
+            "id": request.get("id"),
+            "method": method,
+            "tool": (request.get("params") or {{}}).get("name") if method == "tools/call" else None,
+            "server": server_name,
+            "request_bytes": request_bytes,
+            "response_bytes": response_bytes,
+            "duration_ms": round((time.monotonic() - started) * 1000, 3),
+        }}, request, response)
+        if not traced:
+            self.metrics.inc("mcp_filter_trace_dropped_total")
+
+    async def respond(self, request: dict):
+        """
+        Handle one client message.
+
+        Returns:
+            (response, server_name): the response message, serialized line or
+            raw response (None for notifications), and the backend involved
+        """
+        method = request.get("method")
+        server_name = None
+        # Response message, or an already serialized response line
+        response = None
+
+        # Handle initialize request
+        if method == "initialize":
+            capabilities = {{"tools": {{"listChanged": True}}}}
+            if "resources" in ITEM_CAPABILITIES:
+                capabilities["resources"] = {{"listChanged": True, "subscribe": True}}
+            if "prompts" in ITEM_CAPABILITIES:
+                capabilities["prompts"] = {{"listChanged": True}}
+            response = {{
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "result": {{
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": capabilities,
+                    "serverInfo": {{"name": "mcp-filter-multi", "version": "1.0.0"}}
+                }}
+            }}
+
+        # Handle initialized notification
+        elif method == "notifications/initialized":
+            self.client_initialized = True  # No response needed
+
+        # Handle tools/list request
+        elif method == "tools/list":
+            payload = await self.get_tools_payload()
+            response = (
+                b'{{"jsonrpc": "2.0", "id": ' + json_dumps(request.get("id"))
+                + b', "result": ' + payload + b'}}\\n'
+            )
+
+        # Run a batch of tool calls
+        elif method == "tools/call" and BATCH_TOOL and (request.get("params") or {{}}).get("name") == BATCH_TOOL:
+            response = await self.batch_call(request)
+
+        # Handle tool calls
+        elif method == "tools/call":
+            server_name = TOOL_ROUTES.get((request.get("params") or {{}}).get("name"), [None])[0]
+            response = await self.route_request(request)
+            if response:
+                self.record_tool_call(request, response)
+
+        # Answer pings without involving any backend
+        elif method == "ping":
+            response = {{"jsonrpc": "2.0", "id": request.get("id"), "result": {{}}}}
+
+        # Merge resources, resource templates and prompts from every backend
+        elif method in LIST_METHODS:
+            items = await self.list_items(method)
+            response = {{"jsonrpc": "2.0", "id": request.get("id"), "result": {{LIST_METHODS[method][1]: items}}}}
+
+        # Route reads, subscriptions, prompts and completions to the owning backend
+        elif method in ITEM_METHODS:
+            response, server_name = await self.route_item_request(request)
+
+        # Apply a log level to every backend that supports logging
+        elif method == "logging/setLevel":
+            servers = [name for name in self.ready if "logging" in self.capabilities.get(name, {{}})]
+            await asyncio.gather(*(self.forward_request(name, request) for name in servers))
+            response = {{"jsonrpc": "2.0", "id": request.get("id"), "result": {{}}}}
+
+        # Report the proxy's own metrics
+        elif method == "mcp_filter/metrics":
+            response = {{"jsonrpc": "2.0", "id": request.get("id"), "result": self.metrics.to_json()}}
+
+        # Route client cancellations to the backend handling the request
+        elif method == "notifications/cancelled":
+            await self.cancel_request(request)
+
+        # Forward other notifications to first available server
+        elif self.startups and "id" not in request:
+            first_server = next(iter(self.startups))
+            if await self.wait_ready(first_server):
+                await self.send(first_server, request)
+
+        # Forward other requests to first available server
+        elif self.startups:
+            server_name = next(iter(self.startups))
+            if await self.wait_ready(server_name):
+                response = await self.forward_request(server_name, request)
+            else:
+                response = error_response(request.get("id"), -32603, f"{{server_name}} is unavailable")
+
+        # No backend is running to answer other requests (e.g. before any lazy start)
+        elif "id" in request:
+            response = error_response(request.get("id"), -32601, f"Method {{method}} not found")
+
+        return response, server_name
 
-    def shutdown(self):
+    async def stop_server(self, server_name: str, keep_tools: bool = False):
+        """Terminate one backend and stop reading from it."""
+        self.ready.discard(server_name)
+        if not keep_tools and self.tool_slices.pop(server_name, None) is not None:
+            self.tools_payload = None
+        self.forget_items(server_name)
+        streams = self.streams.pop(server_name, None)
+        process = self.processes.pop(server_name, None)
+        reader = self.readers.pop(server_name, None)
+        if process is not None:
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+        elif streams is not None:
+            streams[1].close()
+        if reader is not None:
+            reader.cancel()
+            # Let the reader finish so it cannot fail requests sent to a relaunched backend
+            await asyncio.wait({{reader}})
+        self.fail_pending(server_name, ConnectionError(f"{{server_name}} was stopped"))
+
+    async def shutdown(self):
         """Terminate all server processes."""
-        for process in self.processes.values():
-            process.terminate()
+        self.closing = True
+        tasks = list(self.supervisors.values()) + list(self.startups.values()) + list(self.schema_checks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*(self.stop_server(name) for name in list(self.streams)))
 
-def main():
+def tool_error(request_id, message: str) -> dict:
+    """Build a tool result reporting a failure to the model."""
+    return {{
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "result": {{"content": [{{"type": "text", "text": message}}], "isError": True}}
+    }}
+
+def error_response(request_id, code: int, message: str) -> dict:
+    """Build a JSON-RPC error response."""
+    return {{
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {{"code": code, "message": message}}
+    }}
+
+# Lines written during the current event loop iteration, flushed together
+output_batch = []
+
+def flush_output():
+    """Write every batched line to the client with a single flush."""
+    if not output_batch:
+        return
+    data = output_batch[0] if len(output_batch) == 1 else b"".join(output_batch)
+    output_batch.clear()
+    try:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    except BrokenPipeError:
+        pass  # The client is gone; serve() stops at the end of its input
+
+def write_line(line: bytes):
+    """
+    Queue one raw JSON-RPC line for the client.
+
+    Responses finished in the same event loop iteration are sent together
+    once the loop gets to the scheduled flush, instead of one flush each.
+    """
+    output_batch.append(line)
+    if len(output_batch) > 1:
+        return  # A flush is already scheduled
+    try:
+        asyncio.get_running_loop().call_soon(flush_output)
+    except RuntimeError:
+        flush_output()
+
+def write_message(message):
+    """Write one JSON-RPC message to the client."""
+    write_line(json_dumps(message) + b"\\n")
+
+async def read_backend_line(reader):
+    """
+    Read one line from a backend.
+
+    Returns the line as bytes, or (spool, size) for lines longer than
+    SPOOL_BYTES, which are written to a temporary file as they arrive.
+    """
+    try:
+        return await reader.readuntil(b"\\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError as e:
+        first = await reader.readexactly(e.consumed)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    spool.write(first)
+    size = len(first)
+    while True:
+        try:
+            chunk = await reader.readuntil(b"\\n")
+        except asyncio.LimitOverrunError as e:
+            chunk = await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError as e:
+            chunk = e.partial + b"\\n"
+        spool.write(chunk)
+        size += len(chunk)
+        if chunk.endswith(b"\\n"):
+            return spool, size
+
+class ThreadedStdinReader:
+    """Read stdin on a worker thread, for inputs the event loop cannot watch."""
+
+    async def readline(self) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+async def open_stdin():
+    """Wrap the process stdin in an asyncio stream reader."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except ValueError:
+        # Regular files (e.g. input redirected from a file) are not pipes
+        return ThreadedStdinReader()
+    return reader
+
+def write_metrics_file(metrics: Metrics):
+    """Write the metrics to METRICS_FILE atomically."""
+    tmp_path = f"{{METRICS_FILE}}.{{os.getpid()}}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(metrics.to_prometheus())
+        os.replace(tmp_path, METRICS_FILE)
+    except OSError as e:
+        print(f"Could not write metrics to {{METRICS_FILE}}: {{e}}", file=sys.stderr)
+
+async def write_metrics_periodically(metrics: Metrics):
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        write_metrics_file(metrics)
+
+async def serve_metrics_http(metrics: Metrics, reader, writer):
+    """Answer one HTTP request with the metrics in Prometheus format."""
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()).strip():
+            pass  # Skip headers
+        parts = request_line.split()
+        if len(parts) >= 2 and parts[1].split(b"?")[0] in (b"/", b"/metrics"):
+            status, body = "200 OK", metrics.to_prometheus().encode()
+        else:
+            status, body = "404 Not Found", b"Not found\\n"
+        writer.write(
+            f"HTTP/1.0 {{status}}\\r\\nContent-Type: text/plain; version=0.0.4\\r\\n"
+            f"Content-Length: {{len(body)}}\\r\\nConnection: close\\r\\n\\r\\n".encode() + body
+        )
+        await writer.drain()
+    except (OSError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def start_metrics_export(metrics: Metrics) -> list:
+    """Start the configured metrics exporters and return their tasks."""
+    tasks = []
+    if METRICS_FILE:
+        tasks.append(asyncio.ensure_future(write_metrics_periodically(metrics)))
+    if METRICS_PORT:
+        try:
+            server = await asyncio.start_server(
+                lambda reader, writer: serve_metrics_http(metrics, reader, writer), "127.0.0.1", METRICS_PORT
+            )
+        except OSError as e:
+            print(f"Could not serve metrics on port {{METRICS_PORT}}: {{e}}", file=sys.stderr)
+        else:
+            tasks.append(asyncio.ensure_future(server.serve_forever()))
+    return tasks
+
+async def handle_line_safely(proxy: MultiServerProxy, line: bytes):
+    """Handle a client message, reporting failures instead of crashing the loop."""
+    try:
+        await proxy.handle_line(line)
+    except Exception as e:
+        print(f"Error handling request: {{e}}", file=sys.stderr)
+
+async def serve():
     proxy = MultiServerProxy()
     proxy.start_servers()
+    exporters = await start_metrics_export(proxy.metrics)
+    in_flight = set()
+    # Bounds memory under load: stdin is left unread until a message finishes
+    capacity = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+    def finished(task):
+        in_flight.discard(task)
+        capacity.release()
 
     try:
-        for line in sys.stdin:
-            request = json.loads(line)
-
-            # Handle initialize request
-            if request.get("method") == "initialize":
-                response = {{
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {{
-                        "protocolVersion": "2024-11-05",
-                        "capabilities": {{
-                            "tools": {{}}
-                        }},
-                        "serverInfo": {{"name": "mcp-filter-multi", "version": "1.0.0"}}
-                    }}
-                }}
-                sys.stdout.write(json.dumps(response) + "\\n")
-                sys.stdout.flush()
-
-            # Handle initialized notification
-            elif request.get("method") == "notifications/initialized":
-                pass  # No response needed
-
-            # Handle tools/list request
-            elif request.get("method") == "tools/list":
-                all_tools = proxy.get_all_tools()
-                response = {{
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {{"tools": all_tools}}
-                }}
-                sys.stdout.write(json.dumps(response) + "\\n")
-                sys.stdout.flush()
+        reader = await open_stdin()
+        while True:
+            await capacity.acquire()
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                capacity.release()
+                continue
 
-            # Handle tool calls
-            elif request.get("method") == "tools/call":
-                response = proxy.route_request(request)
-                if response:
-                    sys.stdout.write(json.dumps(response) + "\\n")
-                    sys.stdout.flush()
+            # Every message is handled in its own task so that slow backends
+            # never block requests bound for other servers
+            task = asyncio.ensure_future(handle_line_safely(proxy, line))
+            in_flight.add(task)
+            task.add_done_callback(finished)
 
-            # Forward other requests to first available server
-            else:
-                if proxy.processes:
-                    first_server = list(proxy.processes.values())[0]
-                    first_server.stdin.write(line)
-                    first_server.stdin.flush()
-                    response_line = first_server.stdout.readline()
-                    sys.stdout.write(response_line)
-                    sys.stdout.flush()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+    finally:
+        flush_output()
+        for exporter in exporters:
+            exporter.cancel()
+        await proxy.shutdown()
+        if METRICS_FILE:
+            write_metrics_file(proxy.metrics)
+        if proxy.tracer is not None:
+            proxy.tracer.close()
 
+def main():
+    try:
+        asyncio.run(serve())
     except KeyboardInterrupt:
         pass
-    finally:
-        proxy.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -263,9 +2046,18 @@ if __name__ == "__main__":
     @classmethod
     def generate_filtered_mcp(
         cls,
-        server_commands: Dict[str, str],
+        server_commands: Dict[str, LaunchTarget],
         selected_tools: List[Dict[str, Any]],
-        output_file: str
+        output_file: str,
+        startup_timeouts: Optional[Dict[str, float]] = None,
+        tool_aliases: Optional[Dict[str, Dict[str, str]]] = None,
+        prefix_collisions: bool = False,
+        lazy_start: bool = False,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        batch_tool: bool = False,
+        resource_filter: Optional[Dict[str, List[str]]] = None,
+        prompt_filter: Optional[Dict[str, List[str]]] = None,
+        server_capabilities: Optional[Dict[str, Dict[str, Any]]] = None
     ) -> None:
         """
         Generate a complete filtered MCP server wrapper.
@@ -273,15 +2065,42 @@ if __name__ == "__main__":
         This is a convenience method that generates and saves the wrapper in one call.
 
         Args:
-            server_commands: Dictionary mapping server names to their commands
+            server_commands: Dictionary mapping server names to their commands or launch specs
             selected_tools: List of selected tool dictionaries with 'name' and 'server' keys
             output_file: Path to output file
+            startup_timeouts: Optional per-server startup deadlines in seconds
+            tool_aliases: Optional per-server tool renames (see build_tool_routes)
+            prefix_collisions: Prefix clashing tool names with their server name
+            lazy_start: Start backends on first use and stop them when idle
+            cache_ttls: Optional per-tool result cache lifetimes in seconds
+            batch_tool: Also expose the batch_call meta-tool
+            resource_filter: Optional include/exclude patterns for resources
+            prompt_filter: Optional include/exclude patterns for prompts
+            server_capabilities: Optional capabilities each server announced during discovery
+
+        Raises:
+            ValueError: If two selected tools would be exposed under the same name,
+                cache_ttls names a tool that is not exposed, a server command
+                or launch spec is malformed, batch_tool clashes with a tool name,
+                or a resource or prompt filter is malformed
         """
-        wrapper_code = cls.generate_wrapper_code(server_commands, selected_tools)
+        wrapper_code = cls.generate_wrapper_code(
+            server_commands,
+            selected_tools,
+            startup_timeouts=startup_timeouts,
+            tool_aliases=tool_aliases,
+            prefix_collisions=prefix_collisions,
+            lazy_start=lazy_start,
+            cache_ttls=cache_ttls,
+            batch_tool=batch_tool,
+            resource_filter=resource_filter,
+            prompt_filter=prompt_filter,
+            server_capabilities=server_capabilities
+        )
         cls.save_wrapper(wrapper_code, output_file, make_executable=True)
 
         # Print summary
-        tool_names = [tool['name'] for tool in selected_tools]
+        tool_names = list(cls.build_tool_routes(selected_tools, tool_aliases, prefix_collisions))
         tools_by_server = {}
         for tool in selected_tools:
             server = tool.get('server', 'unknown')
@@ -0,0 +1,267 @@
+"""
+Launch - Turn server configurations into process launch specs
+
+A server is started either from its shell-style command string or from a
+structured launch spec stored under the server's "launch" key:
+
+    {
+        "argv": ["npx", "-y", "mcp-remote", "https://mcp.notion.com/mcp"],
+        "env": {"NODE_OPTIONS": "--no-warnings"},   # added to the environment
+        "cwd": "/path/to/run/in",
+        "executable": "/path/to/binary"             # used instead of argv[0]
+    }
+
+Command strings are split with shell quoting rules, so quoted arguments such as
+--header "Authorization: Bearer <TOKEN>" stay one argument. resolve_npx installs
+an npx package once into a local cache so later launches skip the npm registry.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# A server command string or a launch spec dictionary
+LaunchTarget = Union[str, Dict[str, Any]]
+
+PLACEHOLDER_PATTERN = re.compile(r'<([A-Z_][A-Z0-9_]*)>')
+
+# npx options that take a value
+NPX_VALUE_OPTIONS = {"-p", "--package", "-c", "--call"}
+
+
+def server_launch(config: Dict[str, Any]) -> LaunchTarget:
+    """
+    Return what starts a configured server: its launch spec if it has one, else its command.
+
+    Args:
+        config: Server config object with a 'command' and optional 'launch' key
+
+    Returns:
+        Launch spec dictionary or command string
+    """
+    return config.get("launch") or config["command"]
+
+
+def launch_spec(target: LaunchTarget) -> Dict[str, Any]:
+    """
+    Normalize a command string or launch spec into a complete launch spec.
+
+    Args:
+        target: Command string or launch spec dictionary
+
+    Returns:
+        Dictionary with 'argv', 'env', 'cwd' and 'executable' keys
+
+    Raises:
+        ValueError: If the command cannot be split or the spec is malformed
+    """
+    if isinstance(target, str):
+        try:
+            argv = shlex.split(target)
+        except ValueError as e:
+            raise ValueError(f"Invalid command {target!r}: {e}")
+        target = {"argv": argv}
+
+    argv = target.get("argv")
+    if not isinstance(argv, list) or not argv or not all(isinstance(arg, str) for arg in argv):
+        raise ValueError("Launch spec needs a non-empty 'argv' list of strings")
+    env = target.get("env") or {}
+    if not isinstance(env, dict):
+        raise ValueError("Launch spec 'env' must be a mapping of variable names to values")
+
+    return {
+        "argv": list(argv),
+        "env": {str(key): str(value) for key, value in env.items()},
+        "cwd": target.get("cwd"),
+        "executable": target.get("executable"),
+    }
+
+
+def launch_key(target: LaunchTarget) -> str:
+    """
+    Return a stable string identifying a launch target, for cache keys and pooling.
+
+    Args:
+        target: Command string or launch spec dictionary
+
+    Returns:
+        The command itself, or the spec serialized with sorted keys
+    """
+    if isinstance(target, str):
+        return target
+    return json.dumps(target, sort_keys=True)
+
+
+def display_command(target: LaunchTarget) -> str:
+    """
+    Return a shell-quoted command line for showing a launch target to the user.
+
+    Args:
+        target: Command string or launch spec dictionary
+
+    Returns:
+        Command line string
+    """
+    if isinstance(target, str):
+        return target
+    return " ".join(shlex.quote(arg) for arg in target.get("argv", []))
+
+
+def extract_placeholders(target: LaunchTarget) -> List[str]:
+    """
+    Find the <VARIABLE> placeholders used anywhere in a launch target.
+
+    Args:
+        target: Command string or launch spec dictionary
+
+    Returns:
+        List of unique variable names in order of first appearance
+    """
+    return list(dict.fromkeys(PLACEHOLDER_PATTERN.findall(launch_key(target))))
+
+
+def fill_placeholders(target: LaunchTarget, replace: Callable[[str], Optional[str]]) -> LaunchTarget:
+    """
+    Replace <VARIABLE> placeholders in a launch target.
+
+    In a launch spec every argument, environment value, cwd and executable is
+    filled separately, so values containing spaces stay a single argument.
+
+    Args:
+        target: Command string or launch spec dictionary
+        replace: Called with each variable name; returns its value, or None
+            to leave the placeholder in place
+
+    Returns:
+        Target of the same type with placeholders filled
+    """
+    def fill(text: str) -> str:
+        def replacer(match):
+            value = replace(match.group(1))
+            return match.group(0) if value is None else value
+        return PLACEHOLDER_PATTERN.sub(replacer, text)
+
+    if isinstance(target, str):
+        return fill(target)
+
+    filled = dict(target)
+    filled["argv"] = [fill(arg) for arg in target.get("argv", [])]
+    if target.get("env"):
+        filled["env"] = {key: fill(str(value)) for key, value in target["env"].items()}
+    for key in ("cwd", "executable"):
+        if target.get(key):
+            filled[key] = fill(target[key])
+    return filled
+
+
+def popen_kwargs(target: LaunchTarget) -> Dict[str, Any]:
+    """
+    Build the arguments for subprocess.Popen that start a launch target.
+
+    Args:
+        target: Fully resolved command string or launch spec dictionary
+
+    Returns:
+        Dictionary with 'args', 'executable', 'env' and 'cwd'
+    """
+    spec = launch_spec(target)
+    return {
+        "args": spec["argv"],
+        "executable": spec["executable"],
+        "env": dict(os.environ, **spec["env"]) if spec["env"] else None,
+        "cwd": spec["cwd"],
+    }
+
+
+def npx_package(argv: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Find the package an npx command runs.
+
+    Args:
+        argv: Command arguments starting with npx
+
+    Returns:
+        Dictionary with the 'package' spec and the 'args' passed to it, or None
+        if argv is not a plain npx invocation of one package
+    """
+    if not argv or os.path.basename(argv[0]) != "npx":
+        return None
+
+    index = 1
+    while index < len(argv) and argv[index].startswith("-"):
+        if argv[index] in NPX_VALUE_OPTIONS:
+            return None  # Explicit packages and shell calls are left to npx
+        index += 1
+    if index >= len(argv):
+        return None
+    return {"package": argv[index], "args": argv[index + 1:]}
+
+
+def package_name(package: str) -> str:
+    """Strip a version or tag from an npm package spec (e.g. '@scope/pkg@1.2' -> '@scope/pkg')."""
+    at = package.find("@", 1)
+    return package if at == -1 else package[:at]
+
+
+def resolve_npx(target: LaunchTarget, cache_dir: Path, npm: str = "npm") -> Dict[str, Any]:
+    """
+    Install the package behind an npx command once and launch its binary directly.
+
+    The package is installed into its own prefix under cache_dir. An existing
+    install is reused, so only the first call contacts the npm registry.
+
+    Args:
+        target: Command string or launch spec running 'npx [options] <package> [args...]'
+        cache_dir: Directory holding installed packages
+        npm: npm executable to install with
+
+    Returns:
+        Launch spec running the installed binary with the same arguments
+
+    Raises:
+        ValueError: If the target is not an npx command or the package has no binary
+        OSError: If npm is not available or the install fails
+    """
+    spec = launch_spec(target)
+    npx = npx_package(spec["argv"])
+    if npx is None:
+        raise ValueError(f"Not an npx command: {display_command(spec)}")
+
+    package = npx["package"]
+    name = package_name(package)
+    digest = hashlib.sha256(package.encode()).hexdigest()[:12]
+    prefix = Path(cache_dir) / f"{name.lstrip('@').replace('/', '-')}-{digest}"
+    manifest_path = prefix / "node_modules" / name / "package.json"
+
+    if not manifest_path.exists():
+        if shutil.which(npm) is None:
+            raise OSError(f"{npm} not found; install Node.js to resolve npx packages")
+        prefix.mkdir(parents=True, exist_ok=True)
+        result = subprocess.run(
+            [npm, "install", "--no-save", "--no-audit", "--no-fund", "--prefix", str(prefix), package],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        if result.returncode != 0 or not manifest_path.exists():
+            raise OSError(f"npm install {package} failed: {result.stderr.strip()}")
+
+    with open(manifest_path, 'r') as f:
+        bins = json.load(f).get("bin")
+    if isinstance(bins, str):
+        bin_name = name.split("/")[-1]
+    elif isinstance(bins, dict) and bins:
+        bin_name = name.split("/")[-1] if name.split("/")[-1] in bins else next(iter(bins))
+    else:
+        raise ValueError(f"Package {package} has no executable")
+
+    executable = str(prefix / "node_modules" / ".bin" / bin_name)
+    resolved = dict(spec, argv=[executable, *npx["args"]], executable=executable)
+    # Leave unset fields out so the spec stays minimal in saved configs
+    return {key: value for key, value in resolved.items() if value}
@@ -0,0 +1,244 @@
+"""
+Manifest - Generate many filtered MCP servers from one description file
+
+This module reads a JSON or YAML manifest describing several filtered servers
+and generates all of them in a single run. Every backend referenced by the
+manifest is discovered once, in parallel, no matter how many outputs use it.
+
+Example manifest (YAML)::
+
+    output_dir: build/mcp          # optional, relative to the manifest file
+    servers:                       # optional, adds to or overrides configured servers
+      local: python my_server.py   # a command, or a launch spec {argv, env, cwd, executable}
+    outputs:
+      - name: notion_readonly
+        servers: [notion]
+        include: ["search", "get_*"]
+        exclude: ["*delete*"]
+      - name: research
+        servers: [notion, local]
+        include: ["notion:search", "local:*"]
+        aliases: {local: {search: local_search}}
+        resources: {exclude: ["*secret*"]}   # also 'prompts'; both default to all
+
+Patterns use shell-style wildcards. A pattern containing ':' is matched
+against '<server>:<tool>', otherwise against the tool name alone.
+"""
+
+import json
+import os
+import sys
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from mcp_filter.core.discovery import discover_tools
+from mcp_filter.core.env_manager import EnvManager
+from mcp_filter.core.generator import CodeGenerator
+from mcp_filter.core.launch import LaunchTarget, extract_placeholders, fill_placeholders, server_launch
+from mcp_filter.core.tool_cache import ToolCache
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """
+    Read and validate a manifest file.
+
+    Files ending in .yaml or .yml are parsed as YAML (requires PyYAML);
+    anything else is parsed as JSON.
+
+    Args:
+        path: Path to the manifest file
+
+    Returns:
+        Manifest dictionary with an 'outputs' list
+
+    Raises:
+        ValueError: If the file cannot be parsed or is missing required fields
+    """
+    with open(path, 'r') as f:
+        text = f.read()
+
+    if Path(path).suffix.lower() in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError("YAML manifests require PyYAML (pip install pyyaml); use JSON instead")
+        try:
+            manifest = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {path}: {e}")
+    else:
+        try:
+            manifest = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}")
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("outputs"), list):
+        raise ValueError(f"{path}: manifest must be a mapping with an 'outputs' list")
+
+    names = set()
+    for index, output in enumerate(manifest["outputs"]):
+        if not isinstance(output, dict) or not output.get("name"):
+            raise ValueError(f"{path}: output #{index + 1} needs a 'name'")
+        if not output.get("servers"):
+            raise ValueError(f"{path}: output '{output['name']}' needs a 'servers' list")
+        if output["name"] in names:
+            raise ValueError(f"{path}: duplicate output name '{output['name']}'")
+        names.add(output["name"])
+
+    return manifest
+
+
+def tool_matches(server_name: str, tool_name: str, patterns: List[str]) -> bool:
+    """
+    Check a tool against a list of include or exclude patterns.
+
+    Args:
+        server_name: Server the tool belongs to
+        tool_name: Tool name as reported by the server
+        patterns: Shell-style patterns, optionally qualified as 'server:pattern'
+
+    Returns:
+        True if any pattern matches
+    """
+    for pattern in patterns:
+        subject = f"{server_name}:{tool_name}" if ":" in pattern else tool_name
+        if fnmatchcase(subject, pattern):
+            return True
+    return False
+
+
+def select_tools(
+    tools_by_server: Dict[str, List[Dict[str, Any]]],
+    output: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Apply an output's include and exclude patterns to discovered tools.
+
+    Args:
+        tools_by_server: Dictionary mapping server names to their discovered tools
+        output: Output entry from the manifest
+
+    Returns:
+        List of selected tool dictionaries tagged with their 'server'
+    """
+    include = output.get("include") or ["*"]
+    exclude = output.get("exclude") or []
+
+    selected = []
+    for server_name in output["servers"]:
+        for tool in tools_by_server.get(server_name, []):
+            if not tool_matches(server_name, tool["name"], include):
+                continue
+            if tool_matches(server_name, tool["name"], exclude):
+                continue
+            selected.append(dict(tool, server=server_name))
+    return selected
+
+
+def resolve_command(command: LaunchTarget, env_manager: EnvManager) -> LaunchTarget:
+    """
+    Fill <VARIABLE> placeholders from the environment or .env file without prompting.
+
+    Args:
+        command: Command template or launch spec
+        env_manager: Source of variable values
+
+    Returns:
+        Command with known placeholders replaced; unknown ones become empty
+    """
+    values = {}
+    for env_key in extract_placeholders(command):
+        values[env_key] = env_manager.get(env_key)
+        if values[env_key] is None:
+            print(f"Warning: {env_key} is not set; discovery may fail", file=sys.stderr)
+    return fill_placeholders(command, lambda env_key: values.get(env_key) or "")
+
+
+def generate_from_manifest(
+    manifest_path: str,
+    servers: Dict[str, Dict[str, Any]],
+    output_dir: str = "output",
+    tool_cache: Optional[ToolCache] = None,
+    env_manager: Optional[EnvManager] = None,
+    refresh: bool = False
+) -> int:
+    """
+    Generate every filtered server described by a manifest.
+
+    Args:
+        manifest_path: Path to the JSON or YAML manifest
+        servers: Configured servers (name -> config with a 'command' and optional 'launch' key)
+        output_dir: Directory for outputs unless the manifest sets 'output_dir'
+        tool_cache: Optional cache consulted during discovery
+        env_manager: Source of placeholder values. Defaults to EnvManager()
+        refresh: Ignore cached tool lists and query every server
+
+    Returns:
+        Number of outputs that could not be generated
+
+    Raises:
+        ValueError: If the manifest is invalid or references an unknown server
+    """
+    manifest = load_manifest(manifest_path)
+    env_manager = env_manager or EnvManager()
+
+    commands = {name: server_launch(config) for name, config in servers.items()}
+    commands.update(manifest.get("servers") or {})
+
+    if manifest.get("output_dir"):
+        output_dir = os.path.join(os.path.dirname(os.path.abspath(manifest_path)), manifest["output_dir"])
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Discover each referenced server once, however many outputs use it
+    needed = []
+    for output in manifest["outputs"]:
+        for server_name in output["servers"]:
+            if server_name not in commands:
+                raise ValueError(f"Output '{output['name']}' references unknown server '{server_name}'")
+            if server_name not in needed:
+                needed.append(server_name)
+
+    final_commands = {name: resolve_command(commands[name], env_manager) for name in needed}
+
+    tools_by_server = {}
+    capabilities = {}
+    for server_name, tools in discover_tools(final_commands, tool_cache, refresh=refresh, capabilities=capabilities):
+        if not tools:
+            print(f"Warning: No tools found or unable to connect to {server_name}", file=sys.stderr)
+        tools_by_server[server_name] = tools
+
+    failures = 0
+    for output in manifest["outputs"]:
+        filename = output["name"] if output["name"].endswith(".py") else f"{output['name']}.py"
+        output_path = os.path.join(output_dir, filename)
+
+        selected = select_tools(tools_by_server, output)
+        if not selected:
+            print(f"Error: No tools matched for output '{output['name']}'", file=sys.stderr)
+            failures += 1
+            continue
+
+        try:
+            CodeGenerator.generate_filtered_mcp(
+                {name: commands[name] for name in output["servers"]},
+                selected,
+                output_path,
+                startup_timeouts=output.get("startup_timeouts"),
+                tool_aliases=output.get("aliases"),
+                prefix_collisions=output.get("prefix_collisions", True),
+                lazy_start=output.get("lazy_start", False),
+                cache_ttls=output.get("cache_ttls"),
+                batch_tool=output.get("batch_tool", False),
+                resource_filter=output.get("resources"),
+                prompt_filter=output.get("prompts"),
+                server_capabilities={name: capabilities[name] for name in output["servers"] if name in capabilities}
+            )
+        except (ValueError, OSError) as e:
+            print(f"Error: Could not generate '{output['name']}': {e}", file=sys.stderr)
+            failures += 1
+
+    return failures
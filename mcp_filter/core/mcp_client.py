@@ -10,19 +10,24 @@ import subprocess
 import sys
 from typing import Dict, List, Any, Optional
 
+from mcp_filter.core.launch import LaunchTarget, popen_kwargs
+
 
 class MCPClient:
     """Client for communicating with MCP servers via stdio."""
 
-    def __init__(self, command: str):
+    def __init__(self, command: LaunchTarget):
         """
         Initialize MCP client with a server command.
 
         Args:
-            command: The command to start the MCP server (e.g., "npx -y mcp-remote https://...")
+            command: The command to start the MCP server (e.g., "npx -y mcp-remote https://..."),
+                or a launch spec dictionary (see mcp_filter.core.launch)
         """
         self.command = command
         self.process: Optional[subprocess.Popen] = None
+        # Capabilities the server announced in its initialize response
+        self.capabilities: Optional[Dict[str, Any]] = None
 
     def connect(self) -> bool:
         """
@@ -33,7 +38,7 @@ class MCPClient:
         """
         try:
             self.process = subprocess.Popen(
-                self.command.split(),
+                **popen_kwargs(self.command),
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
@@ -73,7 +78,11 @@ class MCPClient:
             self.process.stdin.flush()
 
             response_line = self.process.stdout.readline()
-            return json.loads(response_line)
+            response = json.loads(response_line)
+            result = response.get("result")
+            if isinstance(result, dict):
+                self.capabilities = result.get("capabilities") or {}
+            return response
 
         except Exception as e:
             print(f"Error during initialization: {e}", file=sys.stderr)
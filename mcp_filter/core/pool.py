@@ -0,0 +1,360 @@
+"""
+Backend Pool - Share MCP server processes between filtered wrappers
+
+This module provides the BackendPool daemon, which listens on a Unix socket and
+runs one backend process per distinct server command. Generated wrappers attach
+to it as thin filtering clients instead of spawning private copies of every
+backend.
+
+Protocol: a client connects, writes one line {"attach": <resolved command or launch spec>}
+and then speaks newline-delimited JSON-RPC exactly as it would over a backend's
+stdio. The pool answers initialize from the backend's cached handshake, rewrites
+request ids and progress tokens so clients cannot collide, routes progress and
+request-scoped notifications to the client that owns them, and broadcasts only
+list_changed notifications to every attached client.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from mcp_filter.core.launch import LaunchTarget, launch_key, popen_kwargs
+
+# Maximum size of a single JSON-RPC line
+STREAM_LIMIT = 64 * 1024 * 1024
+
+# Seconds a backend may take to start and answer initialize
+STARTUP_TIMEOUT = 60.0
+
+
+def default_socket_path() -> Path:
+    """Get the default pool socket path (~/.config/mcp-filter/pool.sock)."""
+    return Path.home() / ".config" / "mcp-filter" / "pool.sock"
+
+
+def encode(message: Dict[str, Any]) -> bytes:
+    """Serialize a JSON-RPC message as one newline-terminated line."""
+    return (json.dumps(message) + "\n").encode()
+
+
+class PooledBackend:
+    """One shared backend process and the clients attached to it."""
+
+    def __init__(self, command: LaunchTarget):
+        """
+        Initialize a pooled backend.
+
+        Args:
+            command: Fully resolved command or launch spec used to start the server
+        """
+        self.command = command
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.init_result: Optional[Dict[str, Any]] = None
+        self.clients: Set[asyncio.StreamWriter] = set()
+        # Backend id -> (client connection, client id)
+        self.pending: Dict[int, Tuple[asyncio.StreamWriter, Any]] = {}
+        # Pool progress token -> (client connection, client progress token)
+        self.progress: Dict[int, Tuple[asyncio.StreamWriter, Any]] = {}
+        self.ids = itertools.count(1)
+        self.write_lock = asyncio.Lock()
+        self.reader_task: Optional[asyncio.Task] = None
+        self.init_future: Optional[asyncio.Future] = None
+
+    @property
+    def alive(self) -> bool:
+        """Whether the backend process is still running and its output is being read."""
+        if self.process is None or self.process.returncode is not None:
+            return False
+        return self.reader_task is None or not self.reader_task.done()
+
+    async def start(self) -> None:
+        """Spawn the backend and complete the MCP handshake."""
+        kwargs = popen_kwargs(self.command)
+        self.process = await asyncio.create_subprocess_exec(
+            *kwargs.pop("args"),
+            **kwargs,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=sys.stderr,
+            limit=STREAM_LIMIT
+        )
+        self.init_future = asyncio.get_running_loop().create_future()
+        self.reader_task = asyncio.ensure_future(self.read_loop())
+
+        await self.send({
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "mcp-filter-pool", "version": "1.0.0"}
+            }
+        })
+        response = await asyncio.wait_for(self.init_future, STARTUP_TIMEOUT)
+        if "result" not in response:
+            raise RuntimeError(f"initialize failed: {response.get('error')}")
+        self.init_result = response["result"]
+
+        await self.send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        """Write one JSON-RPC message to the backend."""
+        async with self.write_lock:
+            self.process.stdin.write(encode(message))
+            await self.process.stdin.drain()
+
+    async def forward(self, client: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+        """
+        Forward a client request under a pool-unique id.
+
+        Args:
+            client: Connection the response must be delivered to
+            message: JSON-RPC request from the client
+        """
+        backend_id = next(self.ids)
+        self.pending[backend_id] = (client, message.get("id"))
+
+        params = message.get("params")
+        meta = params.get("_meta") if isinstance(params, dict) else None
+        if isinstance(meta, dict) and "progressToken" in meta:
+            # Progress tokens are chosen by each client, so make them pool-unique
+            self.progress[backend_id] = (client, meta["progressToken"])
+            params = dict(params, _meta=dict(meta, progressToken=backend_id))
+            message = dict(message, params=params)
+
+        await self.send(dict(message, id=backend_id))
+
+    def find_pending(self, client: asyncio.StreamWriter, client_id: Any) -> Optional[int]:
+        """Find the backend id of a client's in-flight request, if any."""
+        for backend_id, (owner, owner_id) in self.pending.items():
+            if owner is client and owner_id == client_id:
+                return backend_id
+        return None
+
+    async def read_loop(self) -> None:
+        """Deliver backend output to the clients it belongs to."""
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+
+                if "method" not in message:
+                    if message.get("id") == 0 and not self.init_future.done():
+                        self.init_future.set_result(message)
+                        continue
+                    self.progress.pop(message.get("id"), None)
+                    client, client_id = self.pending.pop(message.get("id"), (None, None))
+                    if client is not None and not client.is_closing():
+                        client.write(encode(dict(message, id=client_id)))
+                elif "id" in message:
+                    await self.send({
+                        "jsonrpc": "2.0",
+                        "id": message["id"],
+                        "error": {"code": -32601, "message": f"Method {message['method']} not supported"}
+                    })
+                else:
+                    self.route_notification(line, message)
+        except (ValueError, ConnectionError) as e:
+            # e.g. a line longer than STREAM_LIMIT; nothing reads the backend from here on
+            print(f"Pooled backend output unreadable: {e}", file=sys.stderr)
+        finally:
+            if self.process.returncode is None:
+                # Stop a backend nobody reads from, so the next attach starts a fresh one
+                try:
+                    self.process.terminate()
+                except ProcessLookupError:
+                    pass
+            if not self.init_future.done():
+                self.init_future.set_exception(ConnectionError("backend exited during startup"))
+            # Clients notice the exit as EOF and fail or restart on their side
+            for client in list(self.clients):
+                client.close()
+            self.pending.clear()
+            self.progress.clear()
+
+    def route_notification(self, line: bytes, message: Dict[str, Any]) -> None:
+        """
+        Deliver a backend notification to the client it concerns.
+
+        Args:
+            line: Raw notification line as read from the backend
+            message: Parsed notification
+        """
+        if message["method"].endswith("/list_changed"):
+            for client in list(self.clients):
+                if not client.is_closing():
+                    client.write(line)
+            return
+
+        params = message.get("params")
+        if not isinstance(params, dict):
+            return
+
+        token = params.get("progressToken")
+        request_id = params.get("requestId")
+        if isinstance(token, int) and token in self.progress:
+            client, client_token = self.progress[token]
+            message = dict(message, params=dict(params, progressToken=client_token))
+        elif isinstance(request_id, int) and request_id in self.pending:
+            client, client_id = self.pending[request_id]
+            message = dict(message, params=dict(params, requestId=client_id))
+        else:
+            # Notifications not tied to a request belong to no client in particular
+            return
+
+        if not client.is_closing():
+            client.write(encode(message))
+
+    def detach(self, client: asyncio.StreamWriter) -> None:
+        """Forget a client and any requests it abandoned."""
+        self.clients.discard(client)
+        for backend_id, (owner, _) in list(self.pending.items()):
+            if owner is client:
+                del self.pending[backend_id]
+                self.progress.pop(backend_id, None)
+
+    async def stop(self) -> None:
+        """Terminate the backend process."""
+        if self.process is not None and self.process.returncode is None:
+            try:
+                self.process.terminate()
+            except ProcessLookupError:
+                pass
+            await self.process.wait()
+        if self.reader_task is not None:
+            self.reader_task.cancel()
+
+
+class BackendPool:
+    """Unix-socket daemon owning one backend process per distinct command."""
+
+    def __init__(self, socket_path: Optional[Path] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            socket_path: Unix socket to listen on. Defaults to ~/.config/mcp-filter/pool.sock
+        """
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.backends: Dict[str, PooledBackend] = {}
+        self.startups: Dict[str, asyncio.Task] = {}
+
+    async def get_backend(self, command: LaunchTarget) -> PooledBackend:
+        """
+        Return the running backend for a command, starting it at most once.
+
+        Args:
+            command: Fully resolved server command or launch spec
+
+        Returns:
+            A started PooledBackend
+        """
+        key = launch_key(command)
+        startup = self.startups.get(key)
+        if startup is None or (startup.done() and (
+            startup.cancelled()
+            or startup.exception() is not None
+            or not self.backends[key].alive
+        )):
+            self.backends[key] = PooledBackend(command)
+            startup = asyncio.ensure_future(self.backends[key].start())
+            self.startups[key] = startup
+
+        backend = self.backends[key]
+        try:
+            await asyncio.shield(startup)
+        except Exception:
+            await backend.stop()
+            raise
+        return backend
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one attached wrapper until it disconnects."""
+        backend = None
+        try:
+            command = json.loads(await reader.readline())["attach"]
+            try:
+                backend = await self.get_backend(command)
+                backend.clients.add(writer)
+                start_error = None
+            except Exception as e:
+                start_error = str(e) or type(e).__name__
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                method = message.get("method")
+
+                if start_error is not None:
+                    # Answer the first request with the startup failure and hang up
+                    if "id" in message:
+                        writer.write(encode({
+                            "jsonrpc": "2.0",
+                            "id": message.get("id"),
+                            "error": {"code": -32603, "message": f"Backend failed to start: {start_error}"}
+                        }))
+                        break
+                elif method == "initialize":
+                    writer.write(encode({"jsonrpc": "2.0", "id": message.get("id"), "result": backend.init_result}))
+                elif method == "notifications/initialized":
+                    continue
+                elif method == "notifications/cancelled":
+                    backend_id = backend.find_pending(writer, message.get("params", {}).get("requestId"))
+                    if backend_id is not None:
+                        params = dict(message["params"], requestId=backend_id)
+                        await backend.send(dict(message, params=params))
+                elif "id" in message:
+                    await backend.forward(writer, message)
+                else:
+                    await backend.send(message)
+        except (ValueError, KeyError, ConnectionError) as e:
+            print(f"Pool client error: {e}", file=sys.stderr)
+        finally:
+            if backend is not None:
+                backend.detach(writer)
+            writer.close()
+
+    async def serve(self) -> None:
+        """Listen on the Unix socket until cancelled."""
+        self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        # Resolved commands can carry credentials, so the socket is created
+        # owner-only rather than tightened after it is already listening
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(
+                self.handle_client, path=str(self.socket_path), limit=STREAM_LIMIT
+            )
+        finally:
+            os.umask(old_umask)
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await asyncio.gather(*(backend.stop() for backend in self.backends.values()))
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+
+    def run(self) -> None:
+        """Run the pool daemon in the foreground until interrupted."""
+        print(f"MCP backend pool listening on {self.socket_path}")
+        print(f"Attach wrappers with: export MCP_FILTER_POOL_SOCKET={self.socket_path}")
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
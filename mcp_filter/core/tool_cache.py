@@ -0,0 +1,229 @@
+"""
+Tool Cache - Persist discovered tool catalogs between sessions
+
+This module provides the ToolCache class, which stores the tool list returned
+by each MCP server on disk so repeat sessions can skip starting the server.
+Entries are keyed by server name plus a hash of the resolved command, so a
+changed command or credential never serves another configuration's tools.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp_filter.core.launch import LaunchTarget, launch_key
+
+# Seconds a cached catalog is served without revalidation (1 day)
+DEFAULT_TTL = 24 * 60 * 60
+
+# Seconds a stale catalog may still be served while it is refreshed in the background (30 days)
+DEFAULT_STALE_TTL = 30 * 24 * 60 * 60
+
+
+class ToolCache:
+    """On-disk cache of MCP server tool catalogs with stale-while-revalidate."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        ttl: float = DEFAULT_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL
+    ):
+        """
+        Initialize the tool cache.
+
+        Args:
+            cache_dir: Directory for cache files. Defaults to ~/.config/mcp-filter/cache
+            ttl: Seconds an entry is fresh
+            stale_ttl: Seconds an entry may be served stale while it is refreshed
+        """
+        if cache_dir:
+            self.cache_dir = Path(cache_dir)
+        else:
+            self.cache_dir = Path.home() / ".config" / "mcp-filter" / "cache"
+
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._refreshes: Dict[str, threading.Thread] = {}
+
+    @staticmethod
+    def cache_key(server_name: str, command: LaunchTarget) -> str:
+        """
+        Build the cache key for a server.
+
+        Args:
+            server_name: Configured server name
+            command: Fully resolved command or launch spec used to start the server
+
+        Returns:
+            Key combining the server name and a hash of the command
+        """
+        digest = hashlib.sha256(launch_key(command).encode()).hexdigest()[:16]
+        return f"{server_name}-{digest}"
+
+    def _path(self, server_name: str, command: LaunchTarget) -> Path:
+        return self.cache_dir / f"{self.cache_key(server_name, command)}.json"
+
+    def get(self, server_name: str, command: LaunchTarget) -> Optional[Dict[str, Any]]:
+        """
+        Read a cache entry.
+
+        Args:
+            server_name: Configured server name
+            command: Fully resolved command used to start the server
+
+        Returns:
+            Entry dict with 'fetched_at', 'tools' and, for entries written with
+            them, 'capabilities' keys, or None if missing or unreadable
+        """
+        path = self._path(server_name, command)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            if isinstance(entry.get("tools"), list) and "fetched_at" in entry:
+                return entry
+        except Exception:
+            pass
+        return None
+
+    def put(
+        self,
+        server_name: str,
+        command: LaunchTarget,
+        tools: List[Dict[str, Any]],
+        capabilities: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Store a server's tool catalog.
+
+        Args:
+            server_name: Configured server name
+            command: Fully resolved command used to start the server
+            tools: Tool dictionaries returned by the server
+            capabilities: Optional capabilities the server announced
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(server_name, command)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+        # Write then rename so concurrent readers never see a partial file
+        entry = {"server": server_name, "fetched_at": time.time(), "tools": tools}
+        if capabilities is not None:
+            entry["capabilities"] = capabilities
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, server_name: Optional[str] = None) -> int:
+        """
+        Remove cache entries.
+
+        Args:
+            server_name: Only remove entries for this server. Removes all entries if None.
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.cache_dir.exists():
+            return 0
+
+        removed = 0
+        for path in self.cache_dir.glob("*.json"):
+            if server_name is None or path.stem.rsplit("-", 1)[0] == server_name:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def get_tools(
+        self,
+        server_name: str,
+        command: LaunchTarget,
+        fetch: Callable[[], List[Dict[str, Any]]],
+        refresh: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Return a server's tools from the cache, fetching them only when needed.
+
+        Fresh entries are returned as-is. Entries older than the TTL but within
+        the stale TTL are returned immediately while a background thread fetches
+        a replacement. Missing or expired entries are fetched synchronously.
+
+        Args:
+            server_name: Configured server name
+            command: Fully resolved command used to start the server
+            fetch: Callable that connects to the server and returns its tools
+            refresh: Ignore any cached entry and fetch now
+
+        Returns:
+            List of tool dictionaries (empty if the server could not be reached)
+        """
+        return self.get_catalog(server_name, command, lambda: {"tools": fetch()}, refresh=refresh)["tools"]
+
+    def get_catalog(
+        self,
+        server_name: str,
+        command: LaunchTarget,
+        fetch: Callable[[], Dict[str, Any]],
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Return a server's tools and capabilities, with the same caching as get_tools.
+
+        Args:
+            server_name: Configured server name
+            command: Fully resolved command used to start the server
+            fetch: Callable that connects to the server and returns a dict with
+                'tools' and optional 'capabilities' keys
+            refresh: Ignore any cached entry and fetch now
+
+        Returns:
+            Dict with 'tools' (empty if the server could not be reached) and
+            'capabilities' (missing or None when unknown)
+        """
+        entry = None if refresh else self.get(server_name, command)
+
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age <= self.ttl:
+                return entry
+            if age <= self.stale_ttl:
+                self._revalidate(server_name, command, fetch)
+                return entry
+
+        catalog = fetch()
+        if catalog["tools"]:
+            self.put(server_name, command, catalog["tools"], catalog.get("capabilities"))
+        return catalog
+
+    def _revalidate(
+        self,
+        server_name: str,
+        command: LaunchTarget,
+        fetch: Callable[[], Dict[str, Any]]
+    ) -> None:
+        """Refresh an entry on a background thread, at most once at a time per key."""
+        key = self.cache_key(server_name, command)
+        running = self._refreshes.get(key)
+        if running is not None and running.is_alive():
+            return
+
+        def refresh() -> None:
+            try:
+                catalog = fetch()
+                if catalog["tools"]:
+                    self.put(server_name, command, catalog["tools"], catalog.get("capabilities"))
+            except Exception as e:
+                print(f"Warning: Could not refresh cached tools for {server_name}: {e}", file=sys.stderr)
+
+        # Not a daemon thread, so the refresh completes before the process exits
+        thread = threading.Thread(target=refresh, name=f"refresh-{key}")
+        self._refreshes[key] = thread
+        thread.start()
@@ -9,16 +9,20 @@ import os
 import datetime
 from typing import Dict, List, Any, Tuple
 
-from mcp_filter.core.mcp_client import MCPClient
+from mcp_filter.core.discovery import discover_tools
 from mcp_filter.core.config import ConfigManager
 from mcp_filter.core.generator import CodeGenerator
 from mcp_filter.core.env_manager import EnvManager
+from mcp_filter.core.launch import LaunchTarget, extract_placeholders, fill_placeholders, server_launch
+from mcp_filter.core.tool_cache import ToolCache
 from mcp_filter.cli.display import (
     display_servers,
     display_server_tools,
+    display_discovery_progress,
     display_summary,
     display_separator,
     display_warning,
+    display_error,
 )
 from mcp_filter.cli.selection import (
     select_multiple_servers,
@@ -32,23 +36,33 @@ from mcp_filter.integrations import prompt_add_to_claude
 class InteractiveSession:
     """Manages interactive sessions for creating filtered MCP servers."""
 
-    def __init__(self, config_manager: ConfigManager, output_dir: str = "output"):
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        output_dir: str = "output",
+        refresh_cache: bool = False
+    ):
         """
         Initialize interactive session.
 
         Args:
             config_manager: ConfigManager instance for accessing server configs
             output_dir: Directory where filtered servers will be saved
+            refresh_cache: Ignore cached tool catalogs and query every server
         """
         self.config_manager = config_manager
         self.output_dir = output_dir
         self.servers = config_manager.load_servers()
         self.env_manager = EnvManager()
+        self.tool_cache = ToolCache(config_manager.config_dir / "cache")
+        self.refresh_cache = refresh_cache
+        # Capabilities of the servers discovered by the last collect_tools_from_servers
+        self.server_capabilities: Dict[str, Dict[str, Any]] = {}
 
     def collect_tools_from_servers(
         self,
         selected_server_names: List[str]
-    ) -> Tuple[List[Dict[str, Any]], Dict[str, str], Dict[str, Dict[str, str]]]:
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, LaunchTarget], Dict[str, Dict[str, str]]]:
         """
         Collect tools from multiple servers and let user select which ones to include.
 
@@ -62,34 +76,38 @@ class InteractiveSession:
         server_commands = {}
         server_envs = {}
 
-        for server_name in selected_server_names:
-            display_separator(f"Connecting to {server_name}...")
-
-            server_config = self.servers[server_name]
-            server_command = server_config["command"]
-
-            # Auto-detect required environment variables from command template
-            required_env_keys = self.env_manager.extract_variables(server_command)
-
-            # Prompt for any missing environment variables
-            env_values = {}
-            if required_env_keys:
-                env_values = self.env_manager.prompt_for_missing(required_env_keys)
+        # Ask for every missing credential up front so discovery can run unattended
+        required_env_keys = {
+            server_name: extract_placeholders(server_launch(self.servers[server_name]))
+            for server_name in selected_server_names
+        }
+        all_env_keys = sorted({key for keys in required_env_keys.values() for key in keys})
+        env_values = self.env_manager.prompt_for_missing(all_env_keys) if all_env_keys else {}
 
+        final_commands = {}
+        for server_name in selected_server_names:
             # Replace <VARIABLE> placeholders in command with actual values
-            final_command = server_command
-            for env_key, env_value in env_values.items():
-                final_command = final_command.replace(f"<{env_key}>", env_value)
-
-            client = MCPClient(final_command)
-            tools = client.get_all_tools()
+            final_commands[server_name] = fill_placeholders(
+                server_launch(self.servers[server_name]),
+                lambda env_key: env_values.get(env_key, "")
+            )
+            server_envs[server_name] = {key: env_values.get(key, "") for key in required_env_keys[server_name]}
+
+        display_separator(f"Connecting to {len(final_commands)} server(s)...")
+
+        # Present each server's tools for selection as soon as it answers
+        self.server_capabilities = {}
+        discovered = discover_tools(
+            final_commands, self.tool_cache, refresh=self.refresh_cache, capabilities=self.server_capabilities
+        )
+        for done, (server_name, tools) in enumerate(discovered, 1):
+            display_discovery_progress(server_name, done, len(final_commands), len(tools))
 
             if not tools:
                 display_warning(f"No tools found or unable to connect to {server_name}.")
                 continue
 
-            server_commands[server_name] = server_command
-            server_envs[server_name] = env_values
+            server_commands[server_name] = server_launch(self.servers[server_name])
 
             # Tag tools with their server
             for tool in tools:
@@ -137,12 +155,18 @@ class InteractiveSession:
         filename = get_output_filename(default_filename)
         output_path = os.path.join(self.output_dir, filename)
 
-        # Generate the filtered server
-        CodeGenerator.generate_filtered_mcp(
-            server_commands,
-            all_selected_tools,
-            output_path
-        )
+        # Generate the filtered server, exposing clashing tool names as <server>_<name>
+        try:
+            CodeGenerator.generate_filtered_mcp(
+                server_commands,
+                all_selected_tools,
+                output_path,
+                prefix_collisions=True,
+                server_capabilities=self.server_capabilities
+            )
+        except ValueError as e:
+            display_error(str(e))
+            return get_yes_no_input("Try again?")
         print(f"\n✅ Filtered server created: {output_path}")
         print(f"Run with: python3 {output_path}")
 
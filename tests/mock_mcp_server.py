@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Mock MCP Server - Minimal stdio MCP backend for offline tests
+
+Usage: mock_mcp_server.py <name>
+
+Exposes four tools, each prefixed with the server name, plus one tool named
+'search' shared by every mock:
+    <name>_echo    Echo 'text' back after an optional 'delay' in seconds, first
+                   sending 'progress' progress notifications for the request's
+                   progress token and one for an unrelated token
+    <name>_stats   Report how many requests of each method the server received
+    <name>_exit    Exit immediately without answering
+    <name>_freeze  Stop answering every request, including pings
+It also serves two resources (mock://<name>/readme and mock://<name>/secret),
+a resource template mock://<name>/items/{id} and a prompt <name>_greet.
+Requests are handled on separate threads, so slow calls are answered after
+faster ones sent later. If MOCK_START_LOG is set, the server appends its name
+to that file when it starts.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+NAME = sys.argv[1] if len(sys.argv) > 1 else "mock"
+
+write_lock = threading.Lock()
+counts_lock = threading.Lock()
+method_counts = {}
+frozen = threading.Event()
+
+
+def write(message):
+    """Write one JSON-RPC message to stdout."""
+    with write_lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+
+def result(request, value):
+    """Answer a request with a result."""
+    write({"jsonrpc": "2.0", "id": request["id"], "result": value})
+
+
+def text(request, value):
+    """Answer a tool call with a single text content item."""
+    result(request, {"content": [{"type": "text", "text": value}]})
+
+
+def handle(request):
+    """Handle one request from the proxy."""
+    method = request.get("method")
+    with counts_lock:
+        method_counts[method] = method_counts.get(method, 0) + 1
+
+    if "id" not in request or frozen.is_set():
+        return
+
+    if method == "initialize":
+        result(request, {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {"tools": {}, "resources": {}, "prompts": {}},
+            "serverInfo": {"name": NAME, "version": "1.0.0"}
+        })
+    elif method == "tools/list":
+        result(request, {"tools": [
+            {"name": f"{NAME}_echo", "description": "Echo text", "inputSchema": {"type": "object"}},
+            {"name": f"{NAME}_stats", "description": "Request counts", "inputSchema": {"type": "object"}},
+            {"name": f"{NAME}_exit", "description": "Exit", "inputSchema": {"type": "object"}},
+            {"name": f"{NAME}_freeze", "description": "Hang", "inputSchema": {"type": "object"}},
+            {"name": "search", "description": f"Search {NAME}", "inputSchema": {"type": "object"}},
+        ]})
+    elif method == "ping":
+        result(request, {})
+    elif method == "resources/list":
+        result(request, {"resources": [
+            {"uri": f"mock://{NAME}/readme", "name": f"{NAME}_readme"},
+            {"uri": f"mock://{NAME}/secret", "name": f"{NAME}_secret"},
+        ]})
+    elif method == "resources/templates/list":
+        result(request, {"resourceTemplates": [
+            {"uriTemplate": f"mock://{NAME}/items/{{id}}", "name": f"{NAME}_item"},
+        ]})
+    elif method == "resources/read":
+        uri = request["params"]["uri"]
+        result(request, {"contents": [{"uri": uri, "text": f"{NAME}:{uri}"}]})
+    elif method == "prompts/list":
+        result(request, {"prompts": [{"name": f"{NAME}_greet", "description": "Greeting"}]})
+    elif method == "prompts/get":
+        result(request, {"messages": [
+            {"role": "user", "content": {"type": "text", "text": f"{NAME}:{request['params']['name']}"}}
+        ]})
+    elif method == "tools/call":
+        name = request["params"]["name"]
+        arguments = request["params"].get("arguments", {})
+        if name == f"{NAME}_freeze":
+            frozen.set()
+        elif name == f"{NAME}_stats":
+            with counts_lock:
+                text(request, json.dumps(method_counts))
+        elif name == "search":
+            text(request, f"{NAME}:search")
+        else:
+            token = request["params"].get("_meta", {}).get("progressToken")
+            for step in range(int(arguments.get("progress", 0))):
+                for progress_token in (token, "stray"):
+                    write({
+                        "jsonrpc": "2.0",
+                        "method": "notifications/progress",
+                        "params": {"progressToken": progress_token, "progress": step + 1}
+                    })
+            time.sleep(float(arguments.get("delay", 0)))
+            text(request, f"{NAME}:{arguments.get('text', '')}")
+    else:
+        write({
+            "jsonrpc": "2.0",
+            "id": request["id"],
+            "error": {"code": -32601, "message": f"Method {method} not found"}
+        })
+
+
+def main():
+    if os.environ.get("MOCK_START_LOG"):
+        with open(os.environ["MOCK_START_LOG"], "a") as f:
+            f.write(NAME + "\n")
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request.get("method") == "tools/call" and request["params"]["name"] == f"{NAME}_exit":
+            # Exit from the main thread so the whole process goes away
+            sys.exit(1)
+        threading.Thread(target=handle, args=(request,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
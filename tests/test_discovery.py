@@ -0,0 +1,55 @@
+"""
+Tests for concurrent tool discovery against mock stdio backends.
+
+Run with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+from mcp_filter.core.discovery import discover_tools
+from mcp_filter.core.tool_cache import ToolCache
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_mcp_server.py")
+
+
+def mock_command(name):
+    """Command that starts a mock backend with the given name."""
+    return f"{sys.executable} {MOCK_SERVER} {name}"
+
+
+class DiscoveryTest(unittest.TestCase):
+
+    def test_discovers_every_server(self):
+        results = dict(discover_tools({"a": mock_command("a"), "b": mock_command("b")}))
+        self.assertEqual(set(results), {"a", "b"})
+        self.assertIn("a_echo", [tool["name"] for tool in results["a"]])
+        self.assertIn("b_echo", [tool["name"] for tool in results["b"]])
+
+    def test_unreachable_server_yields_no_tools(self):
+        results = dict(discover_tools({
+            "a": mock_command("a"),
+            "missing": "mcp-filter-no-such-command-xyz"
+        }))
+        self.assertTrue(results["a"])
+        self.assertEqual(results["missing"], [])
+
+    def test_results_are_cached(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ToolCache(tmpdir)
+            dict(discover_tools({"a": mock_command("a")}, cache))
+            self.assertIsNotNone(cache.get("a", mock_command("a")))
+
+    def test_capabilities_are_reported_and_cached(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ToolCache(tmpdir)
+            for _ in range(2):
+                capabilities = {}
+                dict(discover_tools({"a": mock_command("a")}, cache, capabilities=capabilities))
+                self.assertEqual(sorted(capabilities["a"]), ["prompts", "resources", "tools"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,749 @@
+"""
+Offline tests for generated filtered MCP server wrappers.
+
+Each test generates a wrapper combining mock stdio backends
+(tests/mock_mcp_server.py) and drives it over stdin/stdout, so no network
+or npx is needed.
+
+Run with: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import json
+import os
+import queue
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+
+from mcp_filter.core.generator import CodeGenerator
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_mcp_server.py")
+
+
+def mock_command(name):
+    """Command that starts a mock backend with the given name."""
+    return f"{sys.executable} {MOCK_SERVER} {name}"
+
+
+class WrapperProcess:
+    """A running generated wrapper with helpers to exchange JSON-RPC messages."""
+
+    def __init__(self, wrapper_path, env=None):
+        self.process = subprocess.Popen(
+            [sys.executable, wrapper_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=dict(os.environ, **(env or {}))
+        )
+        self.messages = queue.Queue()
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+        self.next_id = 1
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.messages.put(json.loads(line))
+
+    def send(self, message):
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+        self.process.stdin.flush()
+
+    def request(self, method, params=None):
+        """Send a request and return its id."""
+        request_id = self.next_id
+        self.next_id += 1
+        self.send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}})
+        return request_id
+
+    def call(self, name, **arguments):
+        return self.request("tools/call", {"name": name, "arguments": arguments})
+
+    def responses(self, count, timeout=15):
+        """Collect the next `count` responses, skipping notifications, in arrival order."""
+        received = []
+        deadline = time.monotonic() + timeout
+        while len(received) < count:
+            message = self.messages.get(timeout=max(0.01, deadline - time.monotonic()))
+            if "id" in message:
+                received.append(message)
+        return received
+
+    def response(self, timeout=15):
+        return self.responses(1, timeout)[0]
+
+    def initialize(self):
+        self.request("initialize")
+        self.response()
+        self.send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    def close(self):
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def text_of(response):
+    return response["result"]["content"][0]["text"]
+
+
+class GeneratedProxyTest(unittest.TestCase):
+    """End-to-end tests of a generated wrapper against mock backends."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def start_wrapper(self, selected_tools, servers=("a", "b"), env=None, **options):
+        path = os.path.join(self.tmpdir.name, "wrapper.py")
+        CodeGenerator.generate_filtered_mcp(
+            {name: mock_command(name) for name in servers},
+            selected_tools,
+            path,
+            **options
+        )
+        wrapper = WrapperProcess(path, env)
+        self.addCleanup(wrapper.close)
+        wrapper.initialize()
+        return wrapper
+
+    def list_tool_names(self, wrapper):
+        wrapper.request("tools/list")
+        return [tool["name"] for tool in wrapper.response()["result"]["tools"]]
+
+    def wait_for_tools(self, wrapper, expected, timeout=15):
+        """Poll tools/list until backends have started and expose the expected tools."""
+        deadline = time.monotonic() + timeout
+        while True:
+            names = self.list_tool_names(wrapper)
+            if names == expected or time.monotonic() > deadline:
+                return names
+            time.sleep(0.05)
+
+    def test_concurrent_calls_answer_out_of_order(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_echo", "server": "a"},
+            {"name": "b_echo", "server": "b"},
+        ])
+        slow = wrapper.call("a_echo", text="slow", delay=1.5)
+        same_backend = wrapper.call("a_echo", text="fast")
+        other_backend = wrapper.call("b_echo", text="other")
+
+        responses = wrapper.responses(3)
+        self.assertEqual(responses[-1]["id"], slow)
+        by_id = {response["id"]: text_of(response) for response in responses}
+        self.assertEqual(by_id, {slow: "a:slow", same_backend: "a:fast", other_backend: "b:other"})
+
+    def test_large_responses_keep_client_ids(self):
+        for fast_json in ("1", "0"):
+            with self.subTest(fast_json=fast_json):
+                wrapper = self.start_wrapper(
+                    [{"name": "a_echo", "server": "a"}], servers=("a",),
+                    env={"MCP_FILTER_FAST_JSON": fast_json}
+                )
+                # Text that looks like an id must not be mistaken for one
+                text = '"id": "mcpf-0-1" ' + "x" * 200000
+                wrapper.send({"jsonrpc": "2.0", "id": "call-1", "method": "tools/call",
+                              "params": {"name": "a_echo", "arguments": {"text": text}}})
+                wrapper.send({"jsonrpc": "2.0", "id": 7, "method": "tools/call",
+                              "params": {"name": "missing"}})
+                responses = {response["id"]: response for response in wrapper.responses(2)}
+                self.assertEqual(text_of(responses["call-1"]), "a:" + text)
+                self.assertEqual(responses[7]["error"]["code"], -32601)
+                wrapper.close()
+
+    def test_pipelined_requests_are_all_answered(self):
+        wrapper = self.start_wrapper(
+            [{"name": "a_echo", "server": "a"}], servers=("a",), env={"MCP_FILTER_QUEUE_OVERFLOW": "wait"}
+        )
+        lines = b"".join(
+            json.dumps({"jsonrpc": "2.0", "id": index, "method": "tools/call",
+                        "params": {"name": "a_echo", "arguments": {"text": str(index)}}}).encode() + b"\n"
+            for index in range(200)
+        )
+        wrapper.process.stdin.write(lines)
+        wrapper.process.stdin.flush()
+
+        responses = wrapper.responses(200)
+        self.assertEqual(sorted(response["id"] for response in responses), list(range(200)))
+        for response in responses:
+            self.assertEqual(text_of(response), f"a:{response['id']}")
+
+    def test_backends_start_from_launch_specs(self):
+        server = os.path.join(self.tmpdir.name, "mock server.py")
+        with open(MOCK_SERVER) as src, open(server, "w") as dst:
+            dst.write(src.read())
+        path = os.path.join(self.tmpdir.name, "wrapper.py")
+        CodeGenerator.generate_filtered_mcp(
+            {
+                "a": f'{sys.executable} "{server}" a',
+                "b": {"argv": [sys.executable, server, "<MOCK_NAME>"], "cwd": self.tmpdir.name},
+                # Specs saved from older configs may carry unset fields as None
+                "c": {"argv": [sys.executable, server, "c"], "cwd": None, "executable": None},
+            },
+            [{"name": "a_echo", "server": "a"}, {"name": "b_echo", "server": "b"}, {"name": "c_echo", "server": "c"}],
+            path,
+            cache_ttls={"a_echo": None}
+        )
+        wrapper = WrapperProcess(path, {"MOCK_NAME": "b"})
+        self.addCleanup(wrapper.close)
+        wrapper.initialize()
+
+        wrapper.call("a_echo", text="quoted")
+        self.assertEqual(text_of(wrapper.response()), "a:quoted")
+        wrapper.call("b_echo", text="spec")
+        self.assertEqual(text_of(wrapper.response()), "b:spec")
+        wrapper.call("c_echo", text="none")
+        self.assertEqual(text_of(wrapper.response()), "c:none")
+
+    def test_batch_call_runs_calls_concurrently(self):
+        selected = [{"name": "a_echo", "server": "a"}, {"name": "b_echo", "server": "b"}]
+        self.assertNotIn("batch_call", self.list_tool_names(self.start_wrapper(selected)))
+
+        wrapper = self.start_wrapper(selected, batch_tool=True)
+        expected = ["a_echo", "b_echo", "batch_call"]
+        self.assertEqual(self.wait_for_tools(wrapper, expected), expected)
+
+        started = time.monotonic()
+        wrapper.call("batch_call", calls=[
+            {"name": "a_echo", "arguments": {"text": "first", "delay": 1}},
+            {"name": "b_echo", "arguments": {"text": "second", "delay": 1}},
+            {"name": "missing"},
+            {"name": "batch_call", "arguments": {"calls": []}},
+        ])
+        result = wrapper.response()["result"]
+        self.assertLess(time.monotonic() - started, 1.8)
+
+        results = result["structuredContent"]["results"]
+        self.assertEqual(json.loads(result["content"][0]["text"]), results)
+        self.assertEqual(results[0]["result"]["content"][0]["text"], "a:first")
+        self.assertEqual(results[1]["result"]["content"][0]["text"], "b:second")
+        self.assertEqual(results[2]["error"]["code"], -32601)
+        self.assertIn("nested", results[3]["error"]["message"])
+
+        wrapper.call("batch_call", calls=[])
+        self.assertTrue(wrapper.response()["result"]["isError"])
+
+    def test_batch_tool_name_must_be_free(self):
+        with self.assertRaises(ValueError):
+            CodeGenerator.generate_wrapper_code(
+                {"a": mock_command("a")}, [{"name": "a_echo", "server": "a"}],
+                tool_aliases={"a": {"a_echo": "batch_call"}}, batch_tool=True
+            )
+
+    def next_batch(self, wrapper, timeout=15):
+        """Return the next batch (array) response, skipping other messages."""
+        deadline = time.monotonic() + timeout
+        while True:
+            message = wrapper.messages.get(timeout=max(0.01, deadline - time.monotonic()))
+            if isinstance(message, list):
+                return message
+
+    def test_json_rpc_batches_are_answered_as_one_array(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_echo", "server": "a"},
+            {"name": "b_echo", "server": "b"},
+        ], env={"MCP_FILTER_CACHE_SIZE": "0"})
+
+        started = time.monotonic()
+        wrapper.send([
+            {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+             "params": {"name": "a_echo", "arguments": {"text": "one", "delay": 1}}},
+            {"jsonrpc": "2.0", "method": "notifications/progress", "params": {}},
+            {"jsonrpc": "2.0", "id": "two", "method": "tools/call",
+             "params": {"name": "b_echo", "arguments": {"text": "two", "delay": 1}}},
+            {"jsonrpc": "2.0", "id": 3, "method": "tools/list"},
+            42,
+        ])
+        batch = self.next_batch(wrapper)
+        self.assertLess(time.monotonic() - started, 1.8)
+
+        by_id = {response["id"]: response for response in batch}
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(text_of(by_id[1]), "a:one")
+        self.assertEqual(text_of(by_id["two"]), "b:two")
+        self.assertIn("tools", by_id[3]["result"])
+        self.assertEqual(by_id[None]["error"]["code"], -32600)
+
+        wrapper.send([])
+        self.assertEqual(wrapper.response()["error"]["code"], -32600)
+
+    def test_failed_messages_are_answered(self):
+        wrapper = self.start_wrapper([{"name": "a_echo", "server": "a"}], servers=("a",))
+        wrapper.process.stdin.write(b'{"jsonrpc": "2.0", "id": 1, "method"\n')
+        wrapper.process.stdin.flush()
+        response = wrapper.response()
+        self.assertEqual((response["id"], response["error"]["code"]), (None, -32700))
+
+        wrapper.send({"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": None})
+        self.assertEqual(wrapper.response()["error"]["code"], -32601)
+        wrapper.send({"jsonrpc": "2.0", "id": 3, "method": "resources/read", "params": None})
+        self.assertEqual(wrapper.response()["error"]["code"], -32002)
+        wrapper.send({"jsonrpc": "2.0", "id": 4, "method": "tools/call", "params": ["a_echo"]})
+        response = wrapper.response()
+        self.assertEqual((response["id"], response["error"]["code"]), (4, -32603))
+
+        wrapper.call("a_echo", text="still serving")
+        self.assertEqual(text_of(wrapper.response()), "a:still serving")
+
+    def test_resources_and_prompts_are_merged_and_routed(self):
+        wrapper = self.start_wrapper(
+            [{"name": "a_echo", "server": "a"}, {"name": "b_echo", "server": "b"}],
+            resource_filter={"exclude": ["*secret*"]},
+            prompt_filter={"include": ["b:*"]}
+        )
+        wrapper.request("ping")
+        self.assertEqual(wrapper.response()["result"], {})
+
+        wrapper.request("resources/list")
+        uris = [resource["uri"] for resource in wrapper.response()["result"]["resources"]]
+        self.assertEqual(uris, ["mock://a/readme", "mock://b/readme"])
+
+        wrapper.request("resources/templates/list")
+        templates = wrapper.response()["result"]["resourceTemplates"]
+        self.assertEqual([template["name"] for template in templates], ["a_item", "b_item"])
+
+        for uri in ("mock://b/readme", "mock://a/items/42"):
+            wrapper.request("resources/read", {"uri": uri})
+            self.assertEqual(wrapper.response()["result"]["contents"][0]["text"], f"{uri[7]}:{uri}")
+
+        wrapper.request("resources/read", {"uri": "mock://a/secret"})
+        self.assertEqual(wrapper.response()["error"]["code"], -32002)
+
+        wrapper.request("prompts/list")
+        self.assertEqual([prompt["name"] for prompt in wrapper.response()["result"]["prompts"]], ["b_greet"])
+        wrapper.request("prompts/get", {"name": "b_greet"})
+        self.assertEqual(wrapper.response()["result"]["messages"][0]["content"]["text"], "b:b_greet")
+        wrapper.request("prompts/get", {"name": "a_greet"})
+        self.assertEqual(wrapper.response()["error"]["code"], -32602)
+
+    def test_lazy_start_lists_items_without_starting_backends(self):
+        start_log = os.path.join(self.tmpdir.name, "starts")
+        wrapper = self.start_wrapper(
+            [{"name": "a_echo", "server": "a"}, {"name": "b_echo", "server": "b"}],
+            lazy_start=True, env={"MOCK_START_LOG": start_log}
+        )
+        wrapper.request("resources/list")
+        self.assertEqual(wrapper.response()["result"]["resources"], [])
+        wrapper.request("prompts/list")
+        self.assertEqual(wrapper.response()["result"]["prompts"], [])
+        self.assertFalse(os.path.exists(start_log))
+
+        # Backends started by a tool call contribute their items from then on
+        wrapper.call("a_echo", text="hi")
+        wrapper.response()
+        wrapper.request("resources/list")
+        uris = [resource["uri"] for resource in wrapper.response()["result"]["resources"]]
+        self.assertEqual(uris, ["mock://a/readme", "mock://a/secret"])
+        with open(start_log) as f:
+            self.assertEqual(f.read().split(), ["a"])
+
+    def test_only_capabilities_of_some_backend_are_advertised(self):
+        wrapper = self.start_wrapper(
+            [{"name": "a_echo", "server": "a"}, {"name": "b_echo", "server": "b"}],
+            server_capabilities={"a": {"tools": {}}, "b": {"tools": {}, "prompts": {}}}
+        )
+        wrapper.request("initialize")
+        self.assertEqual(sorted(wrapper.response()["result"]["capabilities"]), ["prompts", "tools"])
+
+    def test_resource_filter_keys_are_validated(self):
+        with self.assertRaises(ValueError):
+            CodeGenerator.generate_wrapper_code(
+                {"a": mock_command("a")}, [{"name": "a_echo", "server": "a"}], resource_filter={"only": ["*"]}
+            )
+
+    def test_progress_is_forwarded_for_requests_in_flight(self):
+        wrapper = self.start_wrapper([{"name": "a_echo", "server": "a"}], servers=("a",))
+        wrapper.send({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {
+            "name": "a_echo", "arguments": {"text": "done", "progress": 3}, "_meta": {"progressToken": "tok"}
+        }})
+
+        progress = []
+        while True:
+            message = wrapper.messages.get(timeout=15)
+            if "id" in message:
+                break
+            if message.get("method") == "notifications/progress":
+                progress.append(message["params"])
+        self.assertEqual(text_of(message), "a:done")
+        self.assertEqual(progress, [{"progressToken": "tok", "progress": step} for step in (1, 2, 3)])
+
+    def test_large_responses_are_spooled(self):
+        wrapper = self.start_wrapper(
+            [{"name": "a_echo", "server": "a"}], servers=("a",), env={"MCP_FILTER_SPOOL_BYTES": "65536"}
+        )
+        text = "y" * 300000
+        wrapper.send({"jsonrpc": "2.0", "id": "big", "method": "tools/call",
+                      "params": {"name": "a_echo", "arguments": {"text": text}}})
+        response = wrapper.response()
+        self.assertEqual(response["id"], "big")
+        self.assertEqual(text_of(response), "a:" + text)
+
+        # Spooled responses can also be embedded in a batch
+        wrapper.send([{"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                       "params": {"name": "a_echo", "arguments": {"text": text}}}])
+        batch = self.next_batch(wrapper)
+        self.assertEqual((batch[0]["id"], text_of(batch[0])), (2, "a:" + text))
+
+    def test_tools_list_is_cached(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_echo", "server": "a"},
+            {"name": "a_stats", "server": "a"},
+            {"name": "b_echo", "server": "b"},
+        ])
+        expected = ["a_echo", "a_stats", "b_echo"]
+        self.assertEqual(self.wait_for_tools(wrapper, expected), expected)
+        for _ in range(3):
+            self.assertEqual(self.list_tool_names(wrapper), expected)
+
+        wrapper.call("a_stats")
+        counts = json.loads(text_of(wrapper.response()))
+        self.assertEqual(counts["tools/list"], 1)
+
+    def test_colliding_names_are_rejected_by_default(self):
+        with self.assertRaises(ValueError):
+            CodeGenerator.build_tool_routes([
+                {"name": "search", "server": "a"},
+                {"name": "search", "server": "b"},
+            ])
+
+    def test_prefix_collisions_produce_unique_names(self):
+        routes = CodeGenerator.build_tool_routes([
+            {"name": "search", "server": "a"},
+            {"name": "search", "server": "a"},
+            {"name": "search", "server": "b"},
+            {"name": "a_search", "server": "c"},
+        ], prefix_collisions=True)
+        self.assertEqual(routes, {
+            "a_search_2": ("a", "search"),
+            "b_search": ("b", "search"),
+            "a_search": ("c", "a_search"),
+        })
+
+    def test_prefixed_tools_route_to_their_server(self):
+        wrapper = self.start_wrapper([
+            {"name": "search", "server": "a"},
+            {"name": "search", "server": "b"},
+        ], prefix_collisions=True)
+        self.assertEqual(self.wait_for_tools(wrapper, ["a_search", "b_search"]), ["a_search", "b_search"])
+
+        wrapper.call("b_search")
+        self.assertEqual(text_of(wrapper.response()), "b:search")
+        wrapper.call("search")
+        self.assertEqual(wrapper.response()["error"]["code"], -32601)
+
+    def test_backend_exit_fails_requests_when_restarts_are_disabled(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_exit", "server": "a"},
+            {"name": "a_echo", "server": "a"},
+            {"name": "b_echo", "server": "b"},
+        ], env={"MCP_FILTER_MAX_RESTARTS": "0"})
+        wrapper.call("a_exit")
+        self.assertIn("error", wrapper.response())
+
+        wrapper.call("a_echo", text="after exit")
+        self.assertIn("error", wrapper.response())
+
+        wrapper.call("b_echo", text="still up")
+        self.assertEqual(text_of(wrapper.response()), "b:still up")
+
+    def test_exited_backend_is_restarted(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_exit", "server": "a"},
+            {"name": "a_echo", "server": "a"},
+        ], servers=("a",), env={"MCP_FILTER_RESTART_BACKOFF": "0.1"})
+        wrapper.call("a_exit")
+        self.assertIn("error", wrapper.response())
+
+        wrapper.call("a_echo", text="after exit")
+        self.assertEqual(text_of(wrapper.response()), "a:after exit")
+
+    def test_hung_backend_is_restarted(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_freeze", "server": "a"},
+            {"name": "a_echo", "server": "a"},
+        ], servers=("a",), env={
+            "MCP_FILTER_PING_INTERVAL": "0.2",
+            "MCP_FILTER_PING_TIMEOUT": "0.5",
+            "MCP_FILTER_RESTART_BACKOFF": "0.1",
+        })
+        wrapper.call("a_freeze")
+        self.assertIn("error", wrapper.response())
+
+        wrapper.call("a_echo", text="after hang")
+        self.assertEqual(text_of(wrapper.response()), "a:after hang")
+
+    def test_lazy_start_serves_snapshot_and_stops_idle_backends(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_stats", "server": "a", "description": "Request counts"},
+            {"name": "b_echo", "server": "b"},
+        ], lazy_start=True, env={"MCP_FILTER_IDLE_TIMEOUT": "0.3"})
+        wrapper.request("tools/list")
+        tools = wrapper.response()["result"]["tools"]
+        self.assertEqual([tool["name"] for tool in tools], ["a_stats", "b_echo"])
+        self.assertEqual(tools[0]["description"], "Request counts")
+
+        wrapper.call("a_stats")
+        self.assertEqual(json.loads(text_of(wrapper.response()))["tools/call"], 1)
+        wrapper.call("a_stats")
+        self.assertEqual(json.loads(text_of(wrapper.response()))["tools/call"], 2)
+
+        # After the idle timeout the next call starts a fresh process
+        time.sleep(1)
+        wrapper.call("a_stats")
+        self.assertEqual(json.loads(text_of(wrapper.response()))["tools/call"], 1)
+
+
+    def test_tools_list_is_served_from_embedded_schemas(self):
+        schema = {"type": "object", "properties": {"text": {"type": "string"}}, "additionalProperties": False}
+        wrapper = self.start_wrapper([
+            {"name": "a_echo", "server": "a", "description": "Echo text", "inputSchema": schema},
+            {"name": "a_stats", "server": "a", "description": "Request counts", "inputSchema": {"type": "object"}},
+        ], servers=("a",))
+        wrapper.request("tools/list")
+        tools = wrapper.response()["result"]["tools"]
+        self.assertEqual([tool["name"] for tool in tools], ["a_echo", "a_stats"])
+        self.assertEqual(tools[0]["inputSchema"], schema)
+
+        wrapper.call("a_stats")
+        self.assertNotIn("tools/list", json.loads(text_of(wrapper.response())))
+
+    def test_schema_check_replaces_drifted_snapshot(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_echo", "server": "a", "description": "Old description", "inputSchema": {"type": "object"}},
+        ], servers=("a",), env={"MCP_FILTER_SCHEMA_CHECK": "1"})
+        deadline = time.monotonic() + 15
+        while True:
+            wrapper.request("tools/list")
+            description = wrapper.response()["result"]["tools"][0]["description"]
+            if description == "Echo text" or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        self.assertEqual(description, "Echo text")
+
+
+    def test_full_queue_rejects_requests(self):
+        wrapper = self.start_wrapper([{"name": "a_echo", "server": "a"}], servers=("a",), env={
+            "MCP_FILTER_MAX_CONCURRENCY": "1",
+            "MCP_FILTER_MAX_QUEUE": "1",
+        })
+        for index in range(3):
+            wrapper.call("a_echo", text=str(index), delay=0.5)
+
+        responses = wrapper.responses(3)
+        self.assertEqual(responses[0]["error"]["code"], -32000)
+        self.assertTrue(all("result" in response for response in responses[1:]))
+
+    def test_overflow_wait_serializes_requests(self):
+        wrapper = self.start_wrapper([{"name": "a_echo", "server": "a"}], servers=("a",), env={
+            "MCP_FILTER_MAX_CONCURRENCY": "1",
+            "MCP_FILTER_MAX_QUEUE": "0",
+            "MCP_FILTER_QUEUE_OVERFLOW": "wait",
+        })
+        started = time.monotonic()
+        for index in range(3):
+            wrapper.call("a_echo", text=str(index), delay=0.3)
+        responses = wrapper.responses(3)
+        self.assertGreaterEqual(time.monotonic() - started, 0.9)
+        self.assertEqual(sorted(text_of(response) for response in responses), ["a:0", "a:1", "a:2"])
+
+
+    def test_read_only_results_are_cached(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_echo", "server": "a", "annotations": {"readOnlyHint": True}},
+            {"name": "a_stats", "server": "a"},
+        ], servers=("a",), cache_ttls={"a_stats": 60})
+        for text in ("same", "same", "other"):
+            wrapper.call("a_echo", text=text)
+            self.assertEqual(text_of(wrapper.response()), f"a:{text}")
+
+        wrapper.call("a_stats")
+        first = text_of(wrapper.response())
+        wrapper.call("a_stats")
+        self.assertEqual(text_of(wrapper.response()), first)
+        self.assertEqual(json.loads(first)["tools/call"], 3)
+
+    def test_cache_ttls_must_name_exposed_tools(self):
+        with self.assertRaises(ValueError):
+            CodeGenerator.generate_wrapper_code(
+                {"a": mock_command("a")}, [{"name": "a_echo", "server": "a"}], cache_ttls={"a_stats": 5}
+            )
+
+
+    def test_identical_idempotent_calls_are_coalesced(self):
+        wrapper = self.start_wrapper([
+            {"name": "a_echo", "server": "a", "annotations": {"idempotentHint": True}},
+            {"name": "a_stats", "server": "a"},
+        ], servers=("a",))
+        ids = [wrapper.call("a_echo", text="burst", delay=0.5) for _ in range(3)]
+        other = wrapper.call("a_echo", text="different", delay=0.5)
+
+        responses = wrapper.responses(4)
+        self.assertEqual(sorted(response["id"] for response in responses), sorted(ids + [other]))
+        self.assertEqual(
+            sorted(text_of(response) for response in responses),
+            ["a:burst", "a:burst", "a:burst", "a:different"]
+        )
+
+        wrapper.call("a_stats")
+        self.assertEqual(json.loads(text_of(wrapper.response()))["tools/call"], 3)
+
+
+    def test_metrics_are_reported(self):
+        metrics_file = os.path.join(self.tmpdir.name, "metrics.prom")
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        wrapper = self.start_wrapper([{"name": "a_echo", "server": "a"}], servers=("a",), env={
+            "MCP_FILTER_METRICS_FILE": metrics_file,
+            "MCP_FILTER_METRICS_INTERVAL": "0.1",
+            "MCP_FILTER_METRICS_PORT": str(port),
+        })
+        for _ in range(2):
+            wrapper.call("a_echo", text="hi")
+            wrapper.response()
+        wrapper.call("missing")
+        wrapper.response()
+
+        wrapper.request("mcp_filter/metrics")
+        metrics = wrapper.response()["result"]
+        counters = {(c["name"], c.get("tool")): c["value"] for c in metrics["counters"]}
+        self.assertEqual(counters[("mcp_filter_tool_calls_total", "a_echo")], 2)
+        self.assertEqual(counters[("mcp_filter_tool_errors_total", "missing")], 1)
+        backend = {h["name"]: h["count"] for h in metrics["histograms"] if h["server"] == "a"}
+        self.assertEqual(backend, {"mcp_filter_queue_seconds": 2, "mcp_filter_backend_seconds": 2})
+
+        expected = 'mcp_filter_tool_calls_total{server="a",tool="a_echo"} 2'
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            self.assertIn(expected, response.read().decode())
+
+        # The file is rewritten every interval; wait for a write after the calls
+        deadline = time.monotonic() + 5
+        content = ""
+        while expected not in content and time.monotonic() < deadline:
+            time.sleep(0.05)
+            if os.path.exists(metrics_file):
+                with open(metrics_file) as f:
+                    content = f.read()
+        self.assertIn(expected, content)
+
+
+    def test_trace_log_records_redacted_pairs(self):
+        trace_file = os.path.join(self.tmpdir.name, "trace.jsonl")
+        wrapper = self.start_wrapper([{"name": "a_echo", "server": "a"}], servers=("a",), env={
+            "MCP_FILTER_TRACE_FILE": trace_file,
+            "MCP_FILTER_TRACE_PAYLOADS": "redacted",
+            "MCP_FILTER_TRACE_MAX_BYTES": "2000",
+        })
+        wrapper.request("tools/list")
+        wrapper.response()
+        for _ in range(10):
+            wrapper.call("a_echo", text="hi", api_token="s3cret")
+            wrapper.response()
+        wrapper.close()
+
+        records = []
+        for path in (trace_file + ".1", trace_file):
+            with open(path) as f:
+                records.extend(json.loads(line) for line in f)
+        self.assertTrue(os.path.exists(trace_file + ".1"))
+        self.assertEqual([record["method"] for record in records[-3:]], ["tools/call"] * 3)
+
+        call = records[-1]
+        self.assertEqual((call["tool"], call["server"]), ("a_echo", "a"))
+        self.assertEqual(call["params"]["arguments"], {"text": "hi", "api_token": "[REDACTED]"})
+        self.assertEqual(call["result"]["content"][0]["text"], "a:hi")
+        self.assertGreater(call["response_bytes"], 0)
+
+
+
+class PooledProxyTest(unittest.TestCase):
+    """Generated wrappers attached to a shared backend pool daemon."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.socket_path = os.path.join(self.tmpdir.name, "pool.sock")
+        self.start_log = os.path.join(self.tmpdir.name, "starts")
+        self.pool = subprocess.Popen(
+            [sys.executable, "-m", "mcp_filter", "--config-dir", self.tmpdir.name, "--pool-socket", self.socket_path,
+             "--pool"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=dict(os.environ, MOCK_START_LOG=self.start_log)
+        )
+        self.addCleanup(self.stop_pool)
+        deadline = time.monotonic() + 15
+        while not os.path.exists(self.socket_path):
+            self.assertLess(time.monotonic(), deadline, "pool did not start")
+            time.sleep(0.05)
+
+    def stop_pool(self):
+        self.pool.terminate()
+        self.pool.wait(timeout=10)
+
+    def start_wrapper(self, command=mock_command("a"), env=None, name="wrapper.py"):
+        path = os.path.join(self.tmpdir.name, name)
+        CodeGenerator.generate_filtered_mcp(
+            {"a": command}, [{"name": "a_echo", "server": "a"}, {"name": "a_exit", "server": "a"}], path
+        )
+        wrapper = WrapperProcess(path, dict(env or {}, MCP_FILTER_POOL_SOCKET=self.socket_path))
+        self.addCleanup(wrapper.close)
+        wrapper.initialize()
+        return wrapper
+
+    def backend_starts(self):
+        with open(self.start_log) as f:
+            return f.read().split()
+
+    def test_placeholder_values_stay_one_argument(self):
+        wrapper = self.start_wrapper(f"{sys.executable} {MOCK_SERVER} <MOCKNAME>", {"MOCKNAME": 'a "x'})
+        wrapper.call("a_echo", text="hi")
+        self.assertEqual(text_of(wrapper.response()), 'a "x:hi')
+
+    def test_wrappers_share_one_backend(self):
+        env = {"MCP_FILTER_RESTART_BACKOFF": "0.1"}
+        wrappers = [self.start_wrapper(env=env, name=f"wrapper{index}.py") for index in (1, 2)]
+
+        # Both clients use the same request id and progress token
+        for steps, wrapper in enumerate(wrappers, 2):
+            wrapper.send({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {
+                "name": "a_echo", "arguments": {"text": f"w{steps}", "progress": steps, "delay": 0.3},
+                "_meta": {"progressToken": "tok"}
+            }})
+        for steps, wrapper in enumerate(wrappers, 2):
+            progress = []
+            while True:
+                message = wrapper.messages.get(timeout=15)
+                if "id" in message:
+                    break
+                if message.get("method") == "notifications/progress":
+                    progress.append(message["params"])
+            self.assertEqual((message["id"], text_of(message)), (1, f"a:w{steps}"))
+            self.assertEqual(progress, [{"progressToken": "tok", "progress": step + 1} for step in range(steps)])
+        self.assertEqual(self.backend_starts(), ["a"])
+
+        # A backend that exits is started again when the wrappers reattach
+        wrappers[0].call("a_exit")
+        self.assertIn("error", wrappers[0].response())
+        deadline = time.monotonic() + 15
+        while True:
+            wrappers[1].call("a_echo", text="again")
+            response = wrappers[1].response()
+            if "result" in response or time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        self.assertEqual(text_of(response), "a:again")
+        self.assertEqual(self.backend_starts(), ["a", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests for server launch specs and npx resolution.
+
+Run with: python -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+
+from mcp_filter.core.launch import (
+    extract_placeholders,
+    fill_placeholders,
+    launch_key,
+    launch_spec,
+    npx_package,
+    popen_kwargs,
+    resolve_npx,
+)
+from mcp_filter.core.mcp_client import MCPClient
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_mcp_server.py")
+
+GITHUB_COMMAND = (
+    'npx -y mcp-remote https://api.githubcopilot.com/mcp '
+    '--header "Authorization: Bearer <GITHUB_PERSONAL_ACCESS_TOKEN>"'
+)
+
+# Stand-in for npm that "installs" a package by writing its package.json and binary
+FAKE_NPM = f'''#!{sys.executable}
+import json, os, sys
+prefix = sys.argv[sys.argv.index("--prefix") + 1]
+package = sys.argv[-1]
+name = package.split("@")[0] if not package.startswith("@") else "@" + package[1:].split("@")[0]
+with open(os.path.join(prefix, "calls"), "a") as f:
+    f.write(package + "\\n")
+package_dir = os.path.join(prefix, "node_modules", name)
+os.makedirs(package_dir, exist_ok=True)
+with open(os.path.join(package_dir, "package.json"), "w") as f:
+    json.dump({{"name": name, "bin": {{name.split("/")[-1]: "cli.js"}}}}, f)
+os.makedirs(os.path.join(prefix, "node_modules", ".bin"), exist_ok=True)
+'''
+
+
+class LaunchSpecTest(unittest.TestCase):
+
+    def test_quoted_arguments_stay_whole(self):
+        argv = launch_spec(GITHUB_COMMAND)["argv"]
+        self.assertEqual(argv[-2:], ["--header", "Authorization: Bearer <GITHUB_PERSONAL_ACCESS_TOKEN>"])
+
+    def test_malformed_specs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            launch_spec('npx "unterminated')
+        with self.assertRaises(ValueError):
+            launch_spec({"argv": []})
+        with self.assertRaises(ValueError):
+            launch_spec({"argv": ["server"], "env": ["TOKEN"]})
+
+    def test_placeholders_are_filled_in_every_field(self):
+        spec = {"argv": ["server", "--token", "<TOKEN>"], "env": {"API_KEY": "<TOKEN>"}, "cwd": "/srv/<REGION>"}
+        self.assertEqual(sorted(extract_placeholders(spec)), ["REGION", "TOKEN"])
+
+        filled = fill_placeholders(spec, {"TOKEN": "a b", "REGION": "eu"}.get)
+        self.assertEqual(filled["argv"], ["server", "--token", "a b"])
+        self.assertEqual(filled["env"], {"API_KEY": "a b"})
+        self.assertEqual(filled["cwd"], "/srv/eu")
+        self.assertEqual(fill_placeholders("run <MISSING>", lambda key: None), "run <MISSING>")
+
+    def test_launch_key_ignores_key_order(self):
+        self.assertEqual(launch_key({"argv": ["a"], "cwd": "/"}), launch_key({"cwd": "/", "argv": ["a"]}))
+        self.assertEqual(launch_key("python server.py"), "python server.py")
+
+    def test_popen_kwargs_merge_environment(self):
+        kwargs = popen_kwargs({"argv": ["server"], "env": {"EXTRA": "1"}, "cwd": "/tmp"})
+        self.assertEqual(kwargs["args"], ["server"])
+        self.assertEqual(kwargs["env"]["EXTRA"], "1")
+        self.assertEqual(kwargs["env"]["PATH"], os.environ["PATH"])
+        self.assertIsNone(popen_kwargs("server --flag")["env"])
+
+    def test_client_starts_spec_with_spaces_in_path(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            server = os.path.join(tmpdir, "mock server.py")
+            shutil.copy(MOCK_SERVER, server)
+            for command in (f'{sys.executable} "{server}" a', {"argv": [sys.executable, server, "a"], "cwd": tmpdir}):
+                with self.subTest(command=command):
+                    names = [tool["name"] for tool in MCPClient(command).get_all_tools()]
+                    self.assertIn("a_echo", names)
+
+
+class ResolveNpxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.npm = os.path.join(self.tmpdir.name, "fake-npm")
+        with open(self.npm, "w") as f:
+            f.write(FAKE_NPM)
+        os.chmod(self.npm, os.stat(self.npm).st_mode | stat.S_IEXEC)
+        self.cache_dir = os.path.join(self.tmpdir.name, "npx")
+
+    def test_npx_package_skips_options(self):
+        self.assertEqual(
+            npx_package(["npx", "-y", "mcp-remote", "https://example.com"]),
+            {"package": "mcp-remote", "args": ["https://example.com"]}
+        )
+        self.assertIsNone(npx_package(["npx", "-p", "pkg", "bin"]))
+        self.assertIsNone(npx_package(["python", "server.py"]))
+
+    def test_package_is_installed_once(self):
+        first = resolve_npx(GITHUB_COMMAND, self.cache_dir, npm=self.npm)
+        second = resolve_npx({"argv": ["npx", "--yes", "mcp-remote", "other"]}, self.cache_dir, npm=self.npm)
+
+        self.assertTrue(first["executable"].endswith(os.path.join("node_modules", ".bin", "mcp-remote")))
+        self.assertEqual(first["argv"][0], first["executable"])
+        self.assertEqual(sorted(first), ["argv", "executable"])
+        self.assertEqual(first["argv"][1:], [
+            "https://api.githubcopilot.com/mcp", "--header", "Authorization: Bearer <GITHUB_PERSONAL_ACCESS_TOKEN>"
+        ])
+        self.assertEqual(second["executable"], first["executable"])
+
+        prefix = os.path.dirname(os.path.dirname(os.path.dirname(first["executable"])))
+        with open(os.path.join(prefix, "calls")) as f:
+            self.assertEqual(f.read().split(), ["mcp-remote"])
+
+    def test_scoped_package_binary(self):
+        spec = resolve_npx("npx -y @acme/mcp-server@1.2 --stdio", self.cache_dir, npm=self.npm)
+        self.assertTrue(spec["executable"].endswith(os.path.join(".bin", "mcp-server")))
+        self.assertEqual(spec["argv"][1:], ["--stdio"])
+        with open(os.path.join(os.path.dirname(os.path.dirname(spec["executable"])), "@acme", "mcp-server",
+                               "package.json")) as f:
+            self.assertEqual(json.load(f)["name"], "@acme/mcp-server")
+
+    def test_non_npx_commands_are_rejected(self):
+        with self.assertRaises(ValueError):
+            resolve_npx("python server.py", self.cache_dir, npm=self.npm)
+
+
+if __name__ == "__main__":
+    unittest.main()
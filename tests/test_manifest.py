@@ -0,0 +1,90 @@
+"""
+Tests for batch generation from a manifest file.
+
+Run with: python -m unittest discover tests
+"""
+
+import ast
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from mcp_filter.core.env_manager import EnvManager
+from mcp_filter.core.manifest import generate_from_manifest, load_manifest, tool_matches
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_mcp_server.py")
+
+
+def mock_command(name):
+    """Command that starts a mock backend with the given name."""
+    return f"{sys.executable} {MOCK_SERVER} {name}"
+
+
+def allowed_tools(path):
+    """Read the ALLOWED_TOOLS list embedded in a generated wrapper."""
+    with open(path) as f:
+        for node in ast.parse(f.read()).body:
+            if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == "ALLOWED_TOOLS":
+                return ast.literal_eval(node.value)
+    return None
+
+
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.env_manager = EnvManager(os.path.join(self.tmpdir.name, ".env"))
+
+    def write_manifest(self, manifest):
+        path = os.path.join(self.tmpdir.name, "manifest.json")
+        with open(path, "w") as f:
+            json.dump(manifest, f)
+        return path
+
+    def generate(self, manifest, servers=None):
+        path = self.write_manifest(manifest)
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            return generate_from_manifest(path, servers or {}, env_manager=self.env_manager)
+
+    def test_patterns(self):
+        self.assertTrue(tool_matches("a", "a_echo", ["*_echo"]))
+        self.assertTrue(tool_matches("a", "search", ["a:search"]))
+        self.assertFalse(tool_matches("b", "search", ["a:*"]))
+
+    def test_generates_every_output(self):
+        failures = self.generate({
+            "output_dir": "out",
+            "servers": {"b": mock_command("b")},
+            "outputs": [
+                {"name": "only_a", "servers": ["a"], "include": ["a_*"], "exclude": ["*_exit", "*_freeze"]},
+                {"name": "both", "servers": ["a", "b"], "include": ["*_echo", "b:search"]},
+            ]
+        }, servers={"a": {"command": mock_command("a")}})
+        self.assertEqual(failures, 0)
+
+        out = os.path.join(self.tmpdir.name, "out")
+        self.assertEqual(allowed_tools(os.path.join(out, "only_a.py")), ["a_echo", "a_stats"])
+        self.assertEqual(allowed_tools(os.path.join(out, "both.py")), ["a_echo", "b_echo", "search"])
+
+    def test_output_without_matches_fails(self):
+        failures = self.generate({
+            "output_dir": "out",
+            "servers": {"a": mock_command("a")},
+            "outputs": [{"name": "empty", "servers": ["a"], "include": ["nothing"]}]
+        })
+        self.assertEqual(failures, 1)
+
+    def test_invalid_manifests_are_rejected(self):
+        with self.assertRaises(ValueError):
+            load_manifest(self.write_manifest({"outputs": [{"name": "x"}]}))
+        with self.assertRaises(ValueError):
+            self.generate({"outputs": [{"name": "x", "servers": ["unknown"]}]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Tests for the shared backend pool's handling of one backend process.
+
+Wrappers attached to a running pool are tested in test_generated_proxy.py.
+
+Run with: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+from mcp_filter.core import pool
+from mcp_filter.core.pool import PooledBackend
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_mcp_server.py")
+
+
+class PooledBackendTest(unittest.TestCase):
+
+    def test_unreadable_output_stops_the_backend(self):
+        async def scenario():
+            backend = PooledBackend({"argv": [sys.executable, MOCK_SERVER, "a"]})
+            await backend.start()
+            self.assertTrue(backend.alive)
+
+            # A response longer than the stream limit ends the reader
+            await backend.send({"jsonrpc": "2.0", "id": 99, "method": "tools/call",
+                                "params": {"name": "a_echo", "arguments": {"text": "x" * 4096}}})
+            await asyncio.wait_for(backend.reader_task, 10)
+            self.assertFalse(backend.alive)
+            await asyncio.wait_for(backend.process.wait(), 10)
+            await backend.stop()
+
+        with mock.patch.object(pool, "STREAM_LIMIT", 1024):
+            asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
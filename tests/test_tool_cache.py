@@ -0,0 +1,97 @@
+"""
+Tests for the on-disk tool catalog cache.
+
+Run with: python -m unittest discover tests
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from mcp_filter.core.tool_cache import ToolCache
+
+TOOLS = [{"name": "search", "description": "Search", "inputSchema": {"type": "object"}}]
+
+
+class CountingFetch:
+    """Fetch callable that records how often it was called."""
+
+    def __init__(self, tools):
+        self.tools = tools
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.tools
+
+
+class ToolCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = ToolCache(self.tmpdir.name, ttl=60, stale_ttl=120)
+
+    def age_entry(self, server_name, command, seconds):
+        """Backdate an entry rather than sleeping through the TTL."""
+        path = self.cache._path(server_name, command)
+        with open(path) as f:
+            entry = json.load(f)
+        entry["fetched_at"] = time.time() - seconds
+        with open(path, "w") as f:
+            json.dump(entry, f)
+
+    def test_fresh_entry_skips_fetch(self):
+        fetch = CountingFetch(TOOLS)
+        self.assertEqual(self.cache.get_tools("notion", "cmd", fetch), TOOLS)
+        self.assertEqual(self.cache.get_tools("notion", "cmd", fetch), TOOLS)
+        self.assertEqual(fetch.calls, 1)
+
+    def test_key_includes_command(self):
+        fetch = CountingFetch(TOOLS)
+        self.cache.get_tools("notion", "cmd --token A", fetch)
+        self.cache.get_tools("notion", "cmd --token B", fetch)
+        self.assertEqual(fetch.calls, 2)
+
+    def test_refresh_bypasses_cache(self):
+        fetch = CountingFetch(TOOLS)
+        self.cache.get_tools("notion", "cmd", fetch)
+        self.cache.get_tools("notion", "cmd", fetch, refresh=True)
+        self.assertEqual(fetch.calls, 2)
+
+    def test_stale_entry_is_served_and_revalidated(self):
+        self.cache.get_tools("notion", "cmd", CountingFetch(TOOLS))
+        self.age_entry("notion", "cmd", 90)
+
+        new_tools = [{"name": "create_page"}]
+        fetch = CountingFetch(new_tools)
+        self.assertEqual(self.cache.get_tools("notion", "cmd", fetch), TOOLS)
+        for thread in self.cache._refreshes.values():
+            thread.join()
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(self.cache.get("notion", "cmd")["tools"], new_tools)
+
+    def test_expired_entry_is_fetched_synchronously(self):
+        self.cache.get_tools("notion", "cmd", CountingFetch(TOOLS))
+        self.age_entry("notion", "cmd", 600)
+
+        new_tools = [{"name": "create_page"}]
+        self.assertEqual(self.cache.get_tools("notion", "cmd", CountingFetch(new_tools)), new_tools)
+
+    def test_empty_results_are_not_cached(self):
+        self.cache.get_tools("notion", "cmd", CountingFetch([]))
+        self.assertIsNone(self.cache.get("notion", "cmd"))
+
+    def test_invalidate_by_server(self):
+        self.cache.get_tools("notion", "cmd", CountingFetch(TOOLS))
+        self.cache.get_tools("notion-dev", "cmd", CountingFetch(TOOLS))
+        self.assertEqual(self.cache.invalidate("notion"), 1)
+        self.assertIsNone(self.cache.get("notion", "cmd"))
+        self.assertIsNotNone(self.cache.get("notion-dev", "cmd"))
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()